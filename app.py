@@ -0,0 +1,20 @@
+import streamlit as st
+
+st.set_page_config(page_title="GreenEarth", page_icon="🌍")
+
+st.title("🌍 GreenEarth")
+st.markdown("""
+**All GreenScore and EcoGame apps in one place.**
+
+Pick a page from the sidebar. Every page runs in this same server process, so
+the AI models, scoring tables, planner and sounds are loaded once and shared.
+""")
+
+st.markdown("""
+- 🌱 **GreenScore AI** - full assessment with planner, cohort ranking and streaks
+- 🍃 **GreenScore Lite / Classic / Distil** - the lighter distilgpt2 variants
+- 💾 **GreenScore Cached** - variant with a spinner and sampled recommendations
+- 🎮 **EcoGame Pro** - habits score, daily challenges and the leaderboard
+- 📈 **Benchmark** - memory and startup compared with running each app separately
+- 🔬 **Profiles** - slowest profiled reruns with their hottest frames
+""")
@@ -0,0 +1,108 @@
+import json
+import subprocess
+import sys
+
+from shared import ROOT, VARIANTS
+
+# Loads the given models the same way the apps do and reports how long the
+# imports + loads took and the peak RSS of the process.
+CHILD = """
+import json, resource, sys, time
+start = time.perf_counter()
+import streamlit
+from transformers import pipeline
+models = json.loads(sys.argv[1])
+generators = [pipeline("text-generation", model=m, framework="pt", device=-1) for m in models]
+print(json.dumps({
+    "startup_s": time.perf_counter() - start,
+    "rss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+}))
+"""
+
+# Loads one model from memory-mapped weights, then reports its memory once
+# told to, so every sibling process has mapped the weights by then.
+MAPPED_CHILD = """
+import json, sys
+from model_loader import load_mapped_pipeline, memory_report
+generator = load_mapped_pipeline(sys.argv[1])
+generator("Eco tip:", max_new_tokens=8, do_sample=False)
+print("ready", flush=True)
+sys.stdin.readline()
+print(json.dumps(memory_report()), flush=True)
+sys.stdin.read()
+"""
+
+
+def measure(models: list) -> dict:
+    """Startup time and peak RSS of a fresh process loading `models`"""
+    output = subprocess.run(
+        [sys.executable, "-c", CHILD, json.dumps(models)],
+        capture_output=True, text=True, check=True
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+def run_benchmark(variants: dict = VARIANTS) -> dict:
+    """Compare one process per app against one process loading every model.
+
+    Both sides only import streamlit and load the models, so "shared" is a
+    model-only estimate of the multi-page app, not a measurement of
+    `streamlit run app.py` with its pages' own imports and state.
+    """
+    rows = []
+    for script, model in variants.items():
+        result = measure([model])
+        rows.append({"app": script, "model": model, **result})
+
+    shared = measure(sorted(set(variants.values())))
+    separate = {
+        "startup_s": sum(row["startup_s"] for row in rows),
+        "rss_mb": sum(row["rss_mb"] for row in rows)
+    }
+    return {
+        "rows": rows,
+        "separate": separate,
+        "shared": shared,
+        "rss_saved_mb": separate["rss_mb"] - shared["rss_mb"],
+        "startup_saved_s": separate["startup_s"] - shared["startup_s"]
+    }
+
+
+def measure_mapped(model: str, processes: int = 3) -> list:
+    """Private vs shared memory of several processes mapping the same weights"""
+    children = [
+        subprocess.Popen([sys.executable, "-c", MAPPED_CHILD, model], cwd=ROOT, text=True,
+                         stdin=subprocess.PIPE, stdout=subprocess.PIPE)
+        for _ in range(processes)
+    ]
+    try:
+        for child in children:
+            for line in child.stdout:
+                if line.strip() == "ready":
+                    break
+            else:
+                raise RuntimeError(f"Loader process exited with {child.wait()}")
+        reports = []
+        for child in children:
+            child.stdin.write("report\n")
+            child.stdin.flush()
+            reports.append(json.loads(child.stdout.readline()))
+        return reports
+    finally:
+        for child in children:
+            child.stdin.close()
+            child.wait()
+
+
+if __name__ == "__main__":
+    report = run_benchmark()
+    for row in report["rows"]:
+        print(f"{row['app']:<18} {row['model']:<11} {row['startup_s']:6.1f}s {row['rss_mb']:8.0f} MB")
+    print(f"{'separate total':<30} {report['separate']['startup_s']:6.1f}s {report['separate']['rss_mb']:8.0f} MB")
+    print(f"{'one process (models only)':<30} {report['shared']['startup_s']:6.1f}s {report['shared']['rss_mb']:8.0f} MB")
+    print(f"Saved {report['rss_saved_mb']:.0f} MB and {report['startup_saved_s']:.1f}s")
+
+    print("Memory-mapped gpt2 weights, 3 processes:")
+    for idx, mapped in enumerate(measure_mapped("gpt2")):
+        print(f"  process {idx}: {mapped['private_mb']:6.0f} MB private, {mapped['shared_mb']:6.0f} MB shared, "
+              f"{mapped['weights_mb']:6.0f} MB of mapped weights")
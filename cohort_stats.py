@@ -0,0 +1,297 @@
+import atexit
+import bisect
+import fcntl
+import json
+import math
+import os
+import threading
+import time
+from datetime import date, timedelta
+
+from config import DATA_DIR
+
+COHORT_DIR = DATA_DIR / "cohort"
+
+
+# --- Quantile Sketch ---
+class QuantileSketch:
+    """Mergeable streaming quantile sketch with relative-error buckets.
+
+    Values are counted in logarithmic buckets (DDSketch style), so memory is
+    bounded by the value range rather than the number of users, and two
+    sketches with the same accuracy merge by adding bucket counts.
+    """
+
+    def __init__(self, relative_accuracy: float = 0.01, max_buckets: int = 1024):
+        self.relative_accuracy = relative_accuracy
+        self.max_buckets = max_buckets
+        self.gamma = (1 + relative_accuracy) / (1 - relative_accuracy)
+        self.log_gamma = math.log(self.gamma)
+        self.bins = {}
+        self.zero_count = 0
+        self.count = 0
+        self._cdf = None
+
+    def _key(self, value: float) -> int:
+        return math.ceil(math.log(value) / self.log_gamma)
+
+    def _value(self, key: int) -> float:
+        return 2 * self.gamma ** key / (self.gamma + 1)
+
+    def add(self, value: float, count: int = 1):
+        """Record a value (negative values count as zero)"""
+        if value <= 0:
+            self.zero_count += count
+        else:
+            key = self._key(value)
+            self.bins[key] = self.bins.get(key, 0) + count
+            if len(self.bins) > self.max_buckets:
+                self._collapse()
+        self.count += count
+        self._cdf = None
+
+    def remove(self, value: float, count: int = 1):
+        """Take back a previously added value (ignored if it is not counted)"""
+        if value <= 0:
+            count = min(count, self.zero_count)
+            self.zero_count -= count
+        else:
+            key = self._key(value)
+            if key not in self.bins:
+                # Collapsed into the lowest remaining bucket above it
+                key = min((k for k in self.bins if k > key), default=None)
+                if key is None:
+                    return
+            count = min(count, self.bins[key])
+            self.bins[key] -= count
+            if self.bins[key] == 0:
+                del self.bins[key]
+        self.count -= count
+        self._cdf = None
+
+    def _collapse(self):
+        """Fold the lowest buckets together to stay within max_buckets"""
+        keys = sorted(self.bins)
+        excess = keys[:len(keys) - self.max_buckets + 1]
+        folded = sum(self.bins.pop(key) for key in excess)
+        self.bins[excess[-1]] = folded
+
+    def merge(self, other: "QuantileSketch"):
+        """Add another sketch's counts into this one"""
+        if other.gamma != self.gamma:
+            raise ValueError("Cannot merge sketches with different accuracy")
+        for key, count in other.bins.items():
+            self.bins[key] = self.bins.get(key, 0) + count
+        self.zero_count += other.zero_count
+        self.count += other.count
+        while len(self.bins) > self.max_buckets:
+            self._collapse()
+        self._cdf = None
+
+    def _cumulative(self):
+        if self._cdf is None:
+            keys = sorted(self.bins)
+            totals, running = [], self.zero_count
+            for key in keys:
+                running += self.bins[key]
+                totals.append(running)
+            self._cdf = (keys, totals)
+        return self._cdf
+
+    def rank(self, value: float, inclusive: bool = True) -> float:
+        """Fraction of recorded values at or below (or strictly below) `value`"""
+        if self.count == 0:
+            return 0.0
+        if value <= 0:
+            return self.zero_count / self.count if inclusive else 0.0
+        keys, totals = self._cumulative()
+        search = bisect.bisect_right if inclusive else bisect.bisect_left
+        idx = search(keys, self._key(value))
+        below = totals[idx - 1] if idx else self.zero_count
+        return below / self.count
+
+    def quantile(self, q: float) -> float:
+        """Approximate value at quantile q (0..1)"""
+        if self.count == 0:
+            raise ValueError("Empty sketch")
+        target = q * (self.count - 1)
+        if target < self.zero_count:
+            return 0.0
+        keys, totals = self._cumulative()
+        idx = bisect.bisect_right(totals, target)
+        return self._value(keys[min(idx, len(keys) - 1)])
+
+    def to_dict(self) -> dict:
+        return {
+            "relative_accuracy": self.relative_accuracy,
+            "max_buckets": self.max_buckets,
+            "zero_count": self.zero_count,
+            "bins": {str(key): count for key, count in self.bins.items()}
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "QuantileSketch":
+        sketch = cls(data["relative_accuracy"], data["max_buckets"])
+        sketch.zero_count = data["zero_count"]
+        sketch.bins = {int(key): count for key, count in data["bins"].items()}
+        sketch.count = sketch.zero_count + sum(sketch.bins.values())
+        return sketch
+
+
+# --- Cohort Service ---
+class CohortStats:
+    """Per-category, per-day score sketches shared by every session.
+
+    Each server process claims a numbered slot, holding `cohort_<slot>.lock`
+    for its lifetime, and snapshots its own sketches to `cohort_<slot>.json`
+    (periodically and at exit). It merges the snapshots written by the other
+    processes every `refresh_interval` seconds, when a sketch is read or a
+    snapshot written, so percentiles cover the whole deployment without
+    double counting. A restarted server reclaims a free slot and resumes from
+    that slot's snapshot.
+    """
+
+    def __init__(self, directory=COHORT_DIR, retention_days: int = 30,
+                 snapshot_interval: float = 30.0, refresh_interval: float = 30.0,
+                 relative_accuracy: float = 0.01):
+        self.directory = directory
+        self.retention_days = retention_days
+        self.snapshot_interval = snapshot_interval
+        self.refresh_interval = refresh_interval
+        self.relative_accuracy = relative_accuracy
+        self.local = {}
+        self.remote = {}
+        self._merged = {}
+        self._last_snapshot = time.monotonic()
+        self._last_refresh = time.monotonic()
+        self._lock = threading.Lock()
+        self._snapshot_lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.path = self.directory / f"cohort_{self._claim_slot()}.json"
+        if self.path.exists():
+            self.local = self._read(self.path)
+            self._expire(self.local)
+        self.refresh()
+        atexit.register(self.snapshot)
+
+    def _claim_slot(self) -> int:
+        """Lowest slot whose lock no live process holds"""
+        slot = 0
+        while True:
+            lock_file = open(self.directory / f"cohort_{slot}.lock", "a")
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except BlockingIOError:
+                lock_file.close()
+                slot += 1
+                continue
+            # Kept open: the lock is released when this process exits
+            self._slot_lock = lock_file
+            return slot
+
+    @staticmethod
+    def _read(path) -> dict:
+        """Sketches of one snapshot file, keyed by (category, day)"""
+        try:
+            payload = json.loads(path.read_text())
+        except (OSError, ValueError):
+            return {}
+        sketches = {}
+        for name, data in payload.items():
+            category, day = name.split("|")
+            sketches[(category, day)] = QuantileSketch.from_dict(data)
+        return sketches
+
+    def _new_sketch(self) -> QuantileSketch:
+        return QuantileSketch(self.relative_accuracy)
+
+    def _expire(self, sketches: dict):
+        cutoff = (date.today() - timedelta(days=self.retention_days)).isoformat()
+        for key in [key for key in sketches if key[1] < cutoff]:
+            del sketches[key]
+
+    def record(self, category: str, value: float, day: str = None, replace: float = None):
+        """Add one observation for a category (e.g. "greenscore").
+
+        `replace` is the caller's earlier value for the same category and day,
+        which is taken back so a session counts once per day; the caller keeps
+        it, so the service only holds sketches.
+        """
+        day = day or date.today().isoformat()
+        with self._lock:
+            sketch = self.local.get((category, day))
+            if sketch is None:
+                sketch = self.local[(category, day)] = self._new_sketch()
+                self._expire(self.local)
+            if replace is not None:
+                sketch.remove(replace)
+            sketch.add(value)
+            self._merged.clear()
+            now = time.monotonic()
+            due = now - self._last_snapshot >= self.snapshot_interval
+            if due:
+                self._last_snapshot = now  # Only this caller writes the snapshot
+        if due:
+            self.snapshot()
+            self.refresh()
+
+    def sketch(self, category: str, days: int = 7) -> QuantileSketch:
+        """Merged sketch for a category over the last `days` days"""
+        if time.monotonic() - self._last_refresh >= self.refresh_interval:
+            self.refresh()
+        with self._lock:
+            cached = self._merged.get((category, days))
+            if cached is not None:
+                return cached
+            first_day = (date.today() - timedelta(days=days - 1)).isoformat()
+            merged = self._new_sketch()
+            for sketches in (self.local, self.remote):
+                for (name, day), sketch in sketches.items():
+                    if name == category and day >= first_day:
+                        merged.merge(sketch)
+            self._merged[(category, days)] = merged
+            return merged
+
+    def percentile(self, category: str, value: float, days: int = 7) -> float:
+        """Percentage of recorded values at or below `value`"""
+        return 100 * self.sketch(category, days).rank(value)
+
+    def greener_than(self, category: str, value: float, lower_is_better: bool, days: int = 7) -> float:
+        """Percentage of users with a strictly worse result than `value`"""
+        sketch = self.sketch(category, days)
+        if sketch.count == 0:
+            return 0.0
+        if lower_is_better:
+            return 100 * (1 - sketch.rank(value))
+        return 100 * sketch.rank(value, inclusive=False)
+
+    def snapshot(self):
+        """Write this process's sketches to disk atomically"""
+        # Serialised so an older payload never replaces a newer one
+        with self._snapshot_lock:
+            with self._lock:
+                payload = {
+                    f"{category}|{day}": sketch.to_dict()
+                    for (category, day), sketch in self.local.items()
+                }
+                self._last_snapshot = time.monotonic()
+            tmp_path = self.path.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_text(json.dumps(payload))
+            os.replace(tmp_path, self.path)
+
+    def refresh(self):
+        """Reload and merge the snapshots written by other processes"""
+        remote = {}
+        for path in self.directory.glob("cohort_*.json"):
+            if path == self.path:
+                continue
+            for (category, day), sketch in self._read(path).items():
+                if (category, day) in remote:
+                    remote[(category, day)].merge(sketch)
+                else:
+                    remote[(category, day)] = sketch
+        self._expire(remote)
+        with self._lock:
+            self.remote = remote
+            self._merged.clear()
+            self._last_refresh = time.monotonic()
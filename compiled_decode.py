@@ -0,0 +1,277 @@
+import argparse
+import time
+import warnings
+
+import torch
+import torch.nn.functional as F
+from torch import nn
+
+# Tried in order. TorchScript tracing is preferred: on CPU torch.compile builds
+# for ~a minute and writes the mutated KV cache inputs back as whole copies.
+BACKENDS = ("trace", "compile", "eager")
+
+
+# --- Static-Shape GPT-2 ---
+class StaticGPT2(nn.Module):
+    """GPT-2 forward pass over a fixed-size KV cache.
+
+    Holds references to a Hugging Face GPT2LMHeadModel's weights (no copy)
+    and reimplements its forward for one sequence. Keys and values are
+    written into caches of `max_len` positions and attention always spans
+    the whole cache with a mask, so a single-token step has the same shapes
+    at every position and can be compiled once.
+    """
+
+    def __init__(self, lm, max_len: int = 256):
+        super().__init__()
+        config = lm.config
+        if config.activation_function not in ("gelu_new", "gelu_pytorch_tanh"):
+            raise ValueError(f"Unsupported activation {config.activation_function}")
+        self.n_head = config.n_head
+        self.n_embd = config.n_embd
+        self.head_dim = config.n_embd // config.n_head
+        self.eps = config.layer_norm_epsilon
+        self.max_len = min(max_len, config.n_positions)
+
+        base = lm.transformer
+        self.register_buffer("wte", base.wte.weight.detach(), persistent=False)
+        self.register_buffer("wpe", base.wpe.weight.detach(), persistent=False)
+        self.register_buffer("ln_f_w", base.ln_f.weight.detach(), persistent=False)
+        self.register_buffer("ln_f_b", base.ln_f.bias.detach(), persistent=False)
+        self.register_buffer("cache_positions", torch.arange(self.max_len), persistent=False)
+        # Conv1D layers already store weights as (in, out), ready for addmm
+        self.layers = [
+            {
+                "ln_1": (block.ln_1.weight.detach(), block.ln_1.bias.detach()),
+                "attn": (block.attn.c_attn.weight.detach(), block.attn.c_attn.bias.detach()),
+                "attn_proj": (block.attn.c_proj.weight.detach(), block.attn.c_proj.bias.detach()),
+                "ln_2": (block.ln_2.weight.detach(), block.ln_2.bias.detach()),
+                "fc": (block.mlp.c_fc.weight.detach(), block.mlp.c_fc.bias.detach()),
+                "fc_proj": (block.mlp.c_proj.weight.detach(), block.mlp.c_proj.bias.detach())
+            }
+            for block in base.h
+        ]
+        self.n_layer = len(self.layers)
+
+    def new_cache(self):
+        """Zeroed key and value caches: (layers, heads, max_len, head_dim)"""
+        shape = (self.n_layer, self.n_head, self.max_len, self.head_dim)
+        return torch.zeros(shape, dtype=self.wte.dtype), torch.zeros(shape, dtype=self.wte.dtype)
+
+    def forward(self, tokens, positions, k_cache, v_cache):
+        """Logits for the last of `tokens`, writing their keys/values at `positions`"""
+        E, H, D = self.n_embd, self.n_head, self.head_dim
+        T = tokens.shape[0]
+        x = self.wte[tokens] + self.wpe[positions]
+        # Token t attends to every cache slot up to its own position
+        mask = self.cache_positions.unsqueeze(0) <= positions.unsqueeze(1)
+
+        for idx, layer in enumerate(self.layers):
+            h = F.layer_norm(x, (E,), *layer["ln_1"], self.eps)
+            q, k, v = torch.addmm(layer["attn"][1], h, layer["attn"][0]).split(E, dim=1)
+            k_cache[idx].index_copy_(1, positions, k.view(T, H, D).transpose(0, 1))
+            v_cache[idx].index_copy_(1, positions, v.view(T, H, D).transpose(0, 1))
+            attn = F.scaled_dot_product_attention(
+                q.view(T, H, D).transpose(0, 1), k_cache[idx], v_cache[idx], attn_mask=mask
+            )
+            x = x + torch.addmm(layer["attn_proj"][1], attn.transpose(0, 1).reshape(T, E), layer["attn_proj"][0])
+
+            h = F.layer_norm(x, (E,), *layer["ln_2"], self.eps)
+            h = F.gelu(torch.addmm(layer["fc"][1], h, layer["fc"][0]), approximate="tanh")
+            x = x + torch.addmm(layer["fc_proj"][1], h, layer["fc_proj"][0])
+
+        x = F.layer_norm(x[-1:], (E,), self.ln_f_w, self.ln_f_b, self.eps)
+        return x @ self.wte.T
+
+
+def compile_step(model: StaticGPT2, backend: str):
+    """Single-token step function for a backend; raises if the backend can't build it"""
+    token = torch.zeros(1, dtype=torch.long)
+    position = torch.zeros(1, dtype=torch.long)
+    if backend == "compile":
+        return torch.compile(model, dynamic=False, fullgraph=True)
+    if backend == "trace":
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", torch.jit.TracerWarning)
+            return torch.jit.trace(model, (token, position, *model.new_cache()), check_trace=False)
+    return model
+
+
+# --- Generation ---
+class CompiledGenerator:
+    """Pipeline-compatible GPT-2 text generation on the static-shape decode path.
+
+    The prompt is prefilled eagerly in one pass, then every new token runs
+    the compiled single-token step. Backends are tried in `backends` order
+    and the first whose logits match eager mode on a warm-up step is used;
+    `backend` tells which one that was.
+    """
+
+    def __init__(self, lm, tokenizer, max_len: int = 256, backends=BACKENDS):
+        self.tokenizer = tokenizer
+        self.eos_token_id = tokenizer.eos_token_id
+        self.model = StaticGPT2(lm, max_len).eval()
+        self.max_len = self.model.max_len
+
+        # Same defaults as pipeline("text-generation"): generation config, then task params
+        self.defaults = {
+            "max_length": lm.generation_config.max_length,
+            "do_sample": lm.generation_config.do_sample,
+            "temperature": lm.generation_config.temperature,
+            "top_k": lm.generation_config.top_k,
+            "top_p": lm.generation_config.top_p
+        }
+        self.defaults.update((lm.config.task_specific_params or {}).get("text-generation", {}))
+
+        self.backend, self.step = self._select_backend(backends)
+
+    @torch.inference_mode()
+    def _select_backend(self, backends):
+        prompt = torch.tensor([self.eos_token_id, 0], dtype=torch.long)
+        k_cache, v_cache = self.model.new_cache()
+        self.model(prompt[:1], torch.tensor([0]), k_cache, v_cache)
+        expected = self.model(prompt[1:], torch.tensor([1]), k_cache.clone(), v_cache.clone())
+
+        for backend in backends:
+            try:
+                step = compile_step(self.model, backend)
+                for _ in range(2):  # compile, then run the compiled graph
+                    logits = step(prompt[1:], torch.tensor([1]), k_cache.clone(), v_cache.clone())
+            except Exception as e:
+                warnings.warn(f"{backend} decode backend unavailable, falling back: {e}")
+                continue
+            if torch.allclose(logits, expected, atol=1e-4, rtol=1e-3):
+                return backend, step
+            warnings.warn(f"{backend} decode backend disagrees with eager mode, falling back")
+        return "eager", self.model
+
+    def _sample(self, logits, do_sample: bool, temperature: float, top_k: int, top_p: float) -> int:
+        if not do_sample:
+            return int(logits.argmax())
+        logits = logits / max(temperature, 1e-5)
+        if top_k:
+            threshold = torch.topk(logits, min(top_k, logits.shape[-1])).values[..., -1, None]
+            logits = logits.masked_fill(logits < threshold, float("-inf"))
+        if top_p is not None and top_p < 1.0:
+            ordered, order = logits.sort(descending=True)
+            cumulative = ordered.softmax(-1).cumsum(-1)
+            # Keep the smallest prefix whose probability reaches top_p
+            drop = cumulative - ordered.softmax(-1) >= top_p
+            logits = logits.masked_fill(drop.scatter(-1, order, drop), float("-inf"))
+        return int(torch.multinomial(logits.softmax(-1), 1))
+
+    @torch.inference_mode()
+    def generate_ids(self, prompt_ids: list, max_new_tokens: int, do_sample: bool = False,
+                     temperature: float = 1.0, top_k: int = 0, top_p: float = None,
+                     step_times: list = None) -> list:
+        """New token ids after `prompt_ids`; per-token step latencies go to `step_times`"""
+        if not 0 < len(prompt_ids) < self.max_len:
+            raise ValueError(f"Prompt of {len(prompt_ids)} tokens does not fit the {self.max_len}-token cache")
+        max_new_tokens = min(max_new_tokens, self.max_len - len(prompt_ids))
+        k_cache, v_cache = self.model.new_cache()
+        logits = self.model(torch.tensor(prompt_ids), torch.arange(len(prompt_ids)), k_cache, v_cache)
+
+        new_ids = []
+        position = torch.tensor([len(prompt_ids)])
+        token = torch.zeros(1, dtype=torch.long)
+        while len(new_ids) < max_new_tokens:
+            next_id = self._sample(logits[0], do_sample, temperature, top_k, top_p)
+            new_ids.append(next_id)
+            if next_id == self.eos_token_id or len(new_ids) == max_new_tokens:
+                break
+            token[0] = next_id
+            start = time.perf_counter()
+            logits = self.step(token, position, k_cache, v_cache)
+            if step_times is not None:
+                step_times.append(time.perf_counter() - start)
+            position += 1
+        return new_ids
+
+    def __call__(self, prompt: str, max_length: int = None, max_new_tokens: int = None,
+                 num_return_sequences: int = 1, **params) -> list:
+        params = {**self.defaults, **params}
+        prompt_ids = self.tokenizer.encode(prompt)
+        if max_new_tokens is None:
+            # Like transformers, max_length counts the prompt tokens too
+            max_new_tokens = (max_length or params["max_length"]) - len(prompt_ids)
+        outputs = []
+        for _ in range(num_return_sequences):
+            new_ids = self.generate_ids(
+                prompt_ids, max(max_new_tokens, 1), params["do_sample"],
+                params["temperature"], params["top_k"], params["top_p"]
+            )
+            outputs.append({"generated_text": prompt + self.tokenizer.decode(new_ids, skip_special_tokens=True)})
+        return outputs
+
+
+def load_compiled_generator(model: str, lm=None, max_len: int = 256, backends=BACKENDS) -> CompiledGenerator:
+    """CompiledGenerator for a hub model (or an already loaded GPT2LMHeadModel)"""
+    from transformers import AutoModelForCausalLM, AutoTokenizer
+
+    if lm is None:
+        lm = AutoModelForCausalLM.from_pretrained(model).eval()
+    return CompiledGenerator(lm, AutoTokenizer.from_pretrained(model), max_len, backends)
+
+
+# --- Benchmark ---
+def benchmark(model: str = "distilgpt2", new_tokens: int = 32, repeats: int = 3, backends=BACKENDS,
+              prompt: str = "Give 3 practical eco tips for someone using Car, eating meat Daily, using Grid:") -> dict:
+    """Per-token greedy decode latency: transformers pipeline vs the compiled path"""
+    from transformers import pipeline
+
+    generator = pipeline("text-generation", model=model, framework="pt", device=-1)
+    compiled = load_compiled_generator(model, lm=generator.model, backends=backends)
+    greedy = {"do_sample": False, "min_new_tokens": new_tokens}
+
+    def best_time(fn) -> float:
+        times = []
+        for _ in range(repeats):
+            start = time.perf_counter()
+            fn()
+            times.append(time.perf_counter() - start)
+        return min(times)
+
+    # The pipeline only exposes whole calls, so subtract a one-token call (prefill)
+    generator(prompt, max_new_tokens=2, **greedy)
+    full = best_time(lambda: generator(prompt, max_new_tokens=new_tokens, **greedy))
+    prefill = best_time(lambda: generator(prompt, max_new_tokens=1, do_sample=False))
+    pipeline_ms = 1000 * (full - prefill) / (new_tokens - 1)
+
+    prompt_ids = compiled.tokenizer.encode(prompt)
+    step_times = []
+    for _ in range(repeats):
+        times = []
+        compiled.generate_ids(prompt_ids, new_tokens, step_times=times)
+        step_times.append(sorted(times)[len(times) // 2])
+    compiled_ms = 1000 * min(step_times)
+
+    expected = generator(prompt, max_new_tokens=new_tokens, **greedy)[0]["generated_text"]
+    actual = compiled(prompt, max_new_tokens=new_tokens, do_sample=False)[0]["generated_text"]
+    return {
+        "model": model,
+        "backend": compiled.backend,
+        "new_tokens": new_tokens,
+        "pipeline_ms_per_token": pipeline_ms,
+        "compiled_ms_per_token": compiled_ms,
+        "speedup": pipeline_ms / compiled_ms,
+        "outputs_match": expected == actual
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the compiled GPT-2 decode path")
+    parser.add_argument("models", nargs="*", default=["distilgpt2", "gpt2"])
+    parser.add_argument("--new-tokens", type=int, default=32)
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--backends", default=",".join(BACKENDS), help="comma-separated, tried in order")
+    args = parser.parse_args()
+
+    print(f"{'model':<12} {'backend':<8} {'pipeline ms/tok':>16} {'compiled ms/tok':>16} {'speedup':>8}  match")
+    for model in args.models:
+        report = benchmark(model, args.new_tokens, args.repeats, args.backends.split(","))
+        print(f"{model:<12} {report['backend']:<8} {report['pipeline_ms_per_token']:>16.2f} "
+              f"{report['compiled_ms_per_token']:>16.2f} {report['speedup']:>7.2f}x  {report['outputs_match']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,6 @@
+import os
+from pathlib import Path
+
+# --- Storage ---
+# Everything the apps persist (cohort sketches, leaderboards, logs) lives here
+DATA_DIR = Path(os.environ.get("GREENEARTH_DATA_DIR", "data"))
@@ -1,15 +1,19 @@
 import streamlit as st
-from huggingface_hub import hf_hub_download
-from transformers import pipeline  # 👈 Added missing import
-import base64
-import torch
+import uuid
+from event_log import CHALLENGE
+from profiling import profile_rerun
+from scoring import ECOGAME
+from session_store import current_session_id
+from shared import (load_cohort_stats, load_event_log, load_generator, load_leaderboard,
+                    load_session_store, load_sound, record_cohort)
 
 # --- Constants ---
-MAX_SCORE = 9  # 3 categories × max 3 points each
-HF_REPO = "senkamalam/reward"
+MAX_SCORE = ECOGAME.best_score  # 3 categories × max 3 points each
+CATEGORY_MAX = {key: int(ECOGAME.points[key].max()) for key in ECOGAME.keys}
 
 # --- Scoring System ---
-SCORING_LOGIC = """
+# Points per option are listed by hand: keep them in sync with SCHEMAS["ecogame"] in scoring.py
+SCORING_LOGIC = f"""
 ### 🧮 Scoring System
 **Transportation**  
 🚗 Car (1pt) → 🚌 Bus/Train (2pts) → 🚲 Bike/Walk (3pts)  
@@ -20,58 +24,27 @@ SCORING_LOGIC = """
 **Energy**  
 🔌 Regular Power (1pt) → 🌤️ Some Green (2pts) → 💨 All Renewable (3pts)  
 
-**Maximum Score:** 9 points (3pts × 3 categories)
+**Maximum Score:** {MAX_SCORE} points
 """
 
 # --- Initialize Session State ---
-if 'score' not in st.session_state:
-    st.session_state.score = 0
+if 'player' not in st.session_state:
+    st.session_state.player = f"Player-{uuid.uuid4().hex[:6]}"
 
 # --- Audio System ---
 def play_sound(sound_type: str):
     """Play feedback sounds from Hugging Face Space"""
     try:
-        audio_file = hf_hub_download(
-            repo_id=HF_REPO,
-            filename=f"{sound_type}.mp3",
-            repo_type="space"
-        )
-        with open(audio_file, "rb") as f:
-            audio_data = f.read()
-            b64 = base64.b64encode(audio_data).decode()
-            audio_html = f"""
-            <audio controls autoplay style="display:none">
-                <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
-            </audio>
-            """
-            st.markdown(audio_html, unsafe_allow_html=True)
+        b64 = load_sound(sound_type)
+        audio_html = f"""
+        <audio controls autoplay style="display:none">
+            <source src="data:audio/mp3;base64,{b64}" type="audio/mp3">
+        </audio>
+        """
+        st.markdown(audio_html, unsafe_allow_html=True)
     except Exception as e:
         st.warning(f"🔇 Sound error: {str(e)}")
 
-# --- Scoring Functions ---
-def get_transport_score(transport: str) -> int:
-    """Calculate transportation score"""
-    scores = {"Car": 1, "Bus/Train": 2, "Bike/Walk": 3}
-    return scores.get(transport, 0)
-
-def get_diet_score(diet: str) -> int:
-    """Calculate diet score"""
-    scores = {"Daily": 1, "Weekly": 2, "Sometimes": 3, "Never": 3}
-    return scores.get(diet, 0)
-
-def get_energy_score(energy: str) -> int:
-    """Calculate energy score"""
-    scores = {"Regular Power": 1, "Some Green Energy": 2, "All Renewable": 3}
-    return scores.get(energy, 0)
-
-def calculate_total_score(transport: str, diet: str, energy: str) -> int:
-    """Calculate total eco score"""
-    return (
-        get_transport_score(transport) +
-        get_diet_score(diet) +
-        get_energy_score(energy)
-    )
-
 # --- Main App ---
 def main():
     st.title("🌍 EcoGame Pro")
@@ -88,37 +61,38 @@ def main():
         with col1:
             transport = st.selectbox(
                 "Transportation:",
-                ["Car", "Bus/Train", "Bike/Walk"],
+                ECOGAME.options["transport"],
                 index=0
             )
             
         with col2:
             diet = st.select_slider(
                 "Meat Consumption:",
-                options=["Daily", "Weekly", "Sometimes", "Never"],
+                options=ECOGAME.options["diet"],
                 value="Daily"
             )
             
         with col3:
             energy = st.radio(
                 "Energy Source:",
-                ["Regular Power", "Some Green Energy", "All Renewable"],
+                ECOGAME.options["energy"],
                 index=0
             )
     
     # Calculate scores
     try:
-        transport_score = get_transport_score(transport)
-        diet_score = get_diet_score(diet)
-        energy_score = get_energy_score(energy)
-        total_score = transport_score + diet_score + energy_score
+        result = ECOGAME.evaluate({"transport": transport, "diet": diet, "energy": energy})
+        transport_score = result.scores["transport"]
+        diet_score = result.scores["diet"]
+        energy_score = result.scores["energy"]
+        total_score = result.total
         
         # Display results
         st.subheader("📊 Your Results")
         cols = st.columns(3)
-        cols[0].metric("Transport", f"{transport_score}/3")
-        cols[1].metric("Diet", f"{diet_score}/3")
-        cols[2].metric("Energy", f"{energy_score}/3")
+        cols[0].metric("Transport", f"{transport_score}/{CATEGORY_MAX['transport']}")
+        cols[1].metric("Diet", f"{diet_score}/{CATEGORY_MAX['diet']}")
+        cols[2].metric("Energy", f"{energy_score}/{CATEGORY_MAX['energy']}")
         
         # Progress and feedback
         progress = total_score / MAX_SCORE
@@ -126,10 +100,10 @@ def main():
         st.subheader(f"🏆 Total Score: {total_score}/{MAX_SCORE}")
         
         # Visual feedback
-        if total_score >= 7:
+        if result.tier == "Eco Champion":
             st.success("🌟 Eco Champion! Keep up the great work!")
             play_sound("success")
-        elif total_score >= 4:
+        elif result.tier == "Good Start":
             st.warning("🔄 Good start! Try our challenges to improve")
         else:
             st.error("🌱 Room for growth - check our eco tips below!")
@@ -143,11 +117,7 @@ def main():
     if st.button("💡 Get Personalized Eco Tips"):
         try:
             # Initialize pipeline with explicit model
-            generator = pipeline(
-                "text-generation",
-                model="gpt2",
-                torch_dtype=torch.bfloat16
-            )
+            generator = load_generator("gpt2")
             prompt = f"Give 3 practical eco tips for someone using {transport}, eating meat {diet}, using {energy}:"
             response = generator(prompt, max_length=200)[0]['generated_text']
             st.success(f"**Your Eco Plan:**\n\n{response.split(':')[-1].strip()}")
@@ -158,6 +128,16 @@ def main():
     # Daily Challenges
     st.divider()
     st.header("🚀 Daily Challenges")
+    player = st.text_input("Player name:", key="player")
+    leaderboard = load_leaderboard()
+    events = load_event_log()
+    sessions = load_session_store()
+    session_id = current_session_id()
+
+    # Restore the player's points and streak from the event log
+    if st.session_state.get("loaded_player") != player:
+        sessions.set_score(session_id, events.user_state(player)["challenge_points"])
+        st.session_state.loaded_player = player
     challenges = [
         {"name": "🚌 Public Transport Day", "points": 2},
         {"name": "🥗 Veg Meal Day", "points": 3},
@@ -168,10 +148,40 @@ def main():
     for idx, challenge in enumerate(challenges):
         with cols[idx]:
             if st.button(f"{challenge['name']}\n(+{challenge['points']} pts)"):
-                st.session_state.score += challenge['points']
+                total = sessions.add_score(session_id, challenge['points'])
+                leaderboard.add_points(player, challenge['points'])
+                events.append(player, challenge['name'], challenge['points'], kind=CHALLENGE)
+                record_cohort("challenge_points", total)
                 play_sound("level_up")
                 st.balloons()
                 st.toast(f"🎉 Earned {challenge['points']} points!")
 
+    total = sessions.get(session_id).score
+    if total:
+        greener = load_cohort_stats().greener_than("challenge_points", total, lower_is_better=ECOGAME.lower_is_better)
+        st.metric("Challenge Points", total, help="Compared with players from the last 7 days")
+        st.caption(f"🌍 You're greener than {greener:.0f}% of players!")
+        player_state = events.user_state(player)
+        st.caption(f"🔥 {player_state['streak']}-day streak (best: {player_state['best_streak']})")
+
+    # Leaderboard
+    st.divider()
+    st.header("🏅 Leaderboard")
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**Top Players**")
+        st.table([{"Rank": rank, "Player": name, "Points": points}
+                  for rank, name, points in leaderboard.top(5)])
+    with col2:
+        st.markdown("**Around You**")
+        nearby = leaderboard.around(player)
+        if nearby:
+            st.table([{"Rank": rank, "Player": name, "Points": points}
+                      for rank, name, points in nearby])
+        else:
+            st.info("Complete a challenge to join the leaderboard!")
+
 if __name__ == "__main__":
-    main()
+    # Opt-in: GREENEARTH_PROFILE=1 or ?profile=1 records this rerun (`memory` adds tracemalloc)
+    with profile_rerun("eco_game.py"):
+        main()
@@ -0,0 +1,171 @@
+import argparse
+import itertools
+
+import pandas as pd
+
+from scoring import GREENSCORE, CompiledSchema, SchemaError
+
+# --- Savings Estimates ---
+# Rough yearly CO2 savings (lbs) of each option versus the worst option in its
+# category, in line with the figures quoted in the "Actionable Tips" section.
+SAVINGS_LBS = {
+    "transport": {
+        "Car (Alone)": 0,
+        "Car (Carpool)": 1600,
+        "Public Transport": 2600,
+        "Bike/Walk": 4700
+    },
+    "diet": {
+        "Daily": 0,
+        "3-4 times/week": 1000,
+        "1-2 times/week": 1900,
+        "Vegetarian/Vegan": 3300
+    },
+    "energy": {
+        "Non-Renewable (Grid)": 0,
+        "Mixed Renewable": 3000,
+        "Solar/Wind": 5000
+    }
+}
+
+# Savings tables per schema name; schemas without one are planned on score alone
+SCHEMA_SAVINGS = {"greenscore": SAVINGS_LBS}
+
+
+def format_change(schema: CompiledSchema, category: str, option: str) -> str:
+    """Human readable label for a single habit change"""
+    return f"{schema.labels[category]} → {option}"
+
+
+# --- Planner ---
+class ImprovementPlanner:
+    """Precomputed lattice of every habit combination.
+
+    All answers are computed once at construction time; queries are plain
+    table lookups, and bulk planning is a single vectorized `take`. The
+    schema's first tier is the champion tier, and "better" follows its
+    `lower_is_better`.
+    """
+
+    def __init__(self, schema: CompiledSchema = GREENSCORE, savings: dict = None):
+        if savings is None:
+            savings = SCHEMA_SAVINGS.get(schema.name) or {
+                key: dict.fromkeys(options, 0) for key, options in schema.options.items()
+            }
+        missing = [f"{key}/{option}" for key in schema.keys for option in schema.options[key]
+                   if option not in savings.get(key, {})]
+        if missing:
+            raise SchemaError(f"No savings figures for {', '.join(missing)}")
+        self.schema = schema
+        self.savings = savings
+        self.names = schema.keys
+        self.options = schema.options
+        self.champion_tier = schema.tiers[0]
+        # +1 when a lower score is better, -1 when a higher one is
+        self.direction = 1 if schema.lower_is_better else -1
+        self.lattice = self._build_lattice()
+
+    def _build_lattice(self) -> pd.DataFrame:
+        # Walk the schema's own lattice so row i is lattice index i
+        score = self.schema.score
+        rows = []
+        for flat, combo in enumerate(itertools.product(*(self.options[name] for name in self.names))):
+            choice = dict(zip(self.names, combo))
+            rows.append({
+                **choice,
+                "score": int(self.schema.total[flat]),
+                "tier": self.schema.tiers[self.schema.tier_code[flat]],
+                "badges": int(self.schema.badge_mask[flat]),
+                "badge_names": ", ".join(self.schema.badge_names(int(self.schema.badge_mask[flat]))),
+                "savings_lbs": sum(self.savings[name][choice[name]] for name in self.names)
+            })
+        lattice = pd.DataFrame(rows)
+
+        # Best single change: biggest score improvement, then biggest extra savings
+        next_change, next_score, next_gain = [], [], []
+        for row in rows:
+            best = None
+            for name in self.names:
+                for option in self.options[name]:
+                    if option == row[name]:
+                        continue
+                    new_score = row["score"] - score(name, row[name]) + score(name, option)
+                    gain = self.savings[name][option] - self.savings[name][row[name]]
+                    key = (self.direction * new_score, -gain)
+                    if key[0] < self.direction * row["score"] and (best is None or key < best[0]):
+                        best = (key, format_change(self.schema, name, option), new_score, gain)
+            next_change.append(best[1] if best else "")
+            next_score.append(best[2] if best else row["score"])
+            next_gain.append(best[3] if best else 0)
+        lattice["next_change"] = next_change
+        lattice["next_score"] = next_score
+        lattice["next_savings_lbs"] = next_gain
+
+        # Cheapest path to the champion tier: every category can jump straight to
+        # any option, so the fewest changes is the Hamming distance to the closest
+        # champion combination (ties go to the one saving the most CO2).
+        champions = [row for row in rows if row["tier"] == self.champion_tier]
+        paths = []
+        for row in rows:
+            target = min(
+                champions,
+                key=lambda champ: (
+                    sum(champ[name] != row[name] for name in self.names),
+                    -champ["savings_lbs"]
+                )
+            )
+            steps = [name for name in self.names if target[name] != row[name]]
+            # Order the steps by impact so the plan is ranked
+            steps.sort(key=lambda name: self.direction * (score(name, target[name]) - score(name, row[name])))
+            paths.append(tuple(format_change(self.schema, name, target[name]) for name in steps))
+        lattice["path_to_champion"] = paths
+        lattice["path_length"] = [len(path) for path in paths]
+        for step in range(len(self.names)):
+            lattice[f"step_{step + 1}"] = [path[step] if step < len(path) else "" for path in paths]
+        return lattice
+
+    def lookup(self, transport: str, diet: str, energy: str) -> pd.Series:
+        """Return the precomputed lattice row for one combination"""
+        return self.lattice.iloc[self.schema.encode({"transport": transport, "diet": diet, "energy": energy})]
+
+    def best_next_change(self, transport: str, diet: str, energy: str) -> dict:
+        """Single change that improves the score the most"""
+        row = self.lookup(transport, diet, energy)
+        return {
+            "change": row["next_change"],
+            "new_score": int(row["next_score"]),
+            "new_tier": self.schema.tier(int(row["next_score"])),
+            "extra_savings_lbs": int(row["next_savings_lbs"])
+        }
+
+    def path_to_champion(self, transport: str, diet: str, energy: str) -> list:
+        """Fewest habit changes needed to reach the champion tier"""
+        return list(self.lookup(transport, diet, energy)["path_to_champion"])
+
+    def plan_bulk(self, respondents: pd.DataFrame) -> pd.DataFrame:
+        """Ranked improvement plan for every respondent in one vectorized pass"""
+        flat, valid = self.schema.encode_bulk(respondents)
+        plan = self.lattice.iloc[flat].reset_index(drop=True)
+        steps = [f"step_{step + 1}" for step in range(len(self.names))]
+        plan = plan[["score", "tier", "badge_names", "savings_lbs", "next_change",
+                     "next_score", "next_savings_lbs", "path_length", *steps]]
+        plan = plan.rename(columns={"badge_names": "badges"})
+        plan[~valid] = None
+        plan.index = respondents.index
+        return pd.concat([respondents, plan], axis=1)
+
+
+# --- Command Line ---
+def main():
+    parser = argparse.ArgumentParser(description="Build improvement plans for a respondent CSV")
+    parser.add_argument("respondents", help="CSV with transport, diet and energy columns")
+    parser.add_argument("-o", "--output", default="improvement_plan.csv")
+    args = parser.parse_args()
+
+    respondents = pd.read_csv(args.respondents)
+    ImprovementPlanner().plan_bulk(respondents).to_csv(args.output, index=False)
+    print(f"Wrote {len(respondents)} plans to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
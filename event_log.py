@@ -0,0 +1,282 @@
+import atexit
+import fcntl
+import json
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from contextlib import contextmanager
+from datetime import date, timedelta
+
+from config import DATA_DIR
+
+EVENTS_DIR = DATA_DIR / "events"
+
+# --- Event Kinds ---
+CHALLENGE = 1  # Daily challenge completed (eco_game.py), points are earned
+SAVE = 2       # Score saved in the Progress Tracker (green_ai.py)
+
+# Record layout: crc32, timestamp, points, kind, user length, challenge length,
+# followed by the utf-8 user and challenge names. The crc covers everything
+# after itself so a torn write at the tail is detected and dropped.
+RECORD = struct.Struct("<IdiBHH")
+
+
+def _empty_state() -> dict:
+    return {
+        "challenge_points": 0,
+        "last_score": None,
+        "streak": 0,
+        "best_streak": 0,
+        "last_day": None,
+        "events": 0
+    }
+
+
+def apply_event(state: dict, timestamp: float, points: int, kind: int):
+    """Fold one event into a user's materialized state"""
+    if kind == CHALLENGE:
+        state["challenge_points"] += points
+    elif kind == SAVE:
+        state["last_score"] = points
+    state["events"] += 1
+
+    day = date.fromtimestamp(timestamp)
+    last_day = date.fromisoformat(state["last_day"]) if state["last_day"] else None
+    if last_day is None or day > last_day:
+        state["streak"] = state["streak"] + 1 if last_day == day - timedelta(days=1) else 1
+        state["best_streak"] = max(state["best_streak"], state["streak"])
+        state["last_day"] = day.isoformat()
+
+
+def encode_event(user: str, challenge: str, points: int, kind: int, timestamp: float) -> bytes:
+    user_bytes, challenge_bytes = user.encode(), challenge.encode()
+    body = RECORD.pack(0, timestamp, points, kind, len(user_bytes), len(challenge_bytes))[4:]
+    body += user_bytes + challenge_bytes
+    return struct.pack("<I", zlib.crc32(body)) + body
+
+
+def iter_records(buffer, offset: int = 0):
+    """Yield (end_offset, timestamp, user, challenge, points, kind) from a buffer"""
+    size = len(buffer)
+    unpack = RECORD.unpack_from
+    while offset + RECORD.size <= size:
+        crc, timestamp, points, kind, user_len, challenge_len = unpack(buffer, offset)
+        end = offset + RECORD.size + user_len + challenge_len
+        if end > size or zlib.crc32(buffer[offset + 4:end]) != crc:
+            return
+        names = bytes(buffer[offset + RECORD.size:end])
+        yield end, timestamp, names[:user_len].decode(), names[user_len:].decode(), points, kind
+        offset = end
+
+
+# --- Event Log ---
+class EventLog:
+    """Append-only binary log of score events with snapshots and compaction.
+
+    Every user's state (challenge points, last saved score, streaks) is kept
+    materialized in memory, so a session start is a dict lookup. On open the
+    state is rebuilt from the latest snapshot plus the short log tail written
+    after it. Compaction drops events older than `retention_days` from the log;
+    their effect is already folded into the snapshot. It runs from `snapshot()`
+    once the log has doubled since the last compaction (and is at least
+    `compact_bytes`).
+
+    Several server processes may share the directory. Appends take a shared
+    `flock` on `events.lock`; snapshots and compactions take it exclusively
+    and first replay the events other processes appended, so a snapshot
+    always covers the whole log up to its offset.
+    """
+
+    def __init__(self, directory=EVENTS_DIR, snapshot_every: int = 1000,
+                 retention_days: int = 90, compact_bytes: int = 16 * 1024 * 1024,
+                 fsync: bool = False):
+        self.directory = directory
+        self.snapshot_every = snapshot_every
+        self.retention_days = retention_days
+        self.compact_bytes = compact_bytes
+        self.fsync = fsync
+        self.snapshot_path = directory / "snapshot.json"
+        self._since_snapshot = 0
+        self._compacted_size = 0
+        self._file = None
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self._lock_file = open(directory / "events.lock", "a")
+        with self._lock, self._flock(fcntl.LOCK_EX):
+            self._open(truncate=True)
+        atexit.register(self.close)
+
+    def _log_path(self, generation: int):
+        return self.directory / f"events-{generation:06d}.log"
+
+    @contextmanager
+    def _flock(self, operation: int):
+        """Cross-process lock (self._lock must be held: flock is per open file)"""
+        fcntl.flock(self._lock_file, operation)
+        try:
+            yield
+        finally:
+            fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _open(self, truncate: bool = False):
+        """Load the snapshot and log tail (both locks held)"""
+        self.users = {}
+        self.generation = 0
+        offset = 0
+        if self.snapshot_path.exists():
+            snapshot = json.loads(self.snapshot_path.read_text())
+            self.generation = snapshot["generation"]
+            offset = snapshot["offset"]
+            self.users = snapshot["users"]
+
+        # Leftovers from an interrupted compaction
+        for path in self.directory.glob("events-*.log"):
+            if path != self._log_path(self.generation):
+                path.unlink()
+
+        self.path = self._log_path(self.generation)
+        self.path.touch()
+        self._synced = offset
+        self._own = set()
+        self._catch_up()
+        if truncate and self._synced < self.path.stat().st_size:
+            # Drop a torn record left by a crash mid-append (flock exclusive)
+            os.truncate(self.path, self._synced)
+        if self._file is not None:
+            self._file.close()
+        self._file = open(self.path, "ab")
+
+    def _reopen_if_compacted(self):
+        """Reload after another process compacted the log (both locks held)"""
+        if self._file is not None and os.fstat(self._file.fileno()).st_nlink == 0:
+            # The compacting process replayed our events into its snapshot
+            self._open()
+
+    def _catch_up(self):
+        """Apply events appended since the last sync by other processes (locks held)"""
+        start = self._synced
+        for end, timestamp, user, _, points, kind in self.replay(start):
+            if start not in self._own:
+                apply_event(self.users.setdefault(user, _empty_state()), timestamp, points, kind)
+                self._since_snapshot += 1
+            start = end
+        self._synced = start
+        self._own.clear()
+
+    def _write(self, records: list):
+        """Append encoded records in one write, remembering their offsets (locks held)"""
+        self._file.write(b"".join(records))
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        # O_APPEND leaves the position right after our own write
+        offset = self._file.tell()
+        for record in reversed(records):
+            offset -= len(record)
+            self._own.add(offset)
+
+    def append(self, user: str, challenge: str, points: int, kind: int = CHALLENGE, timestamp: float = None) -> dict:
+        """Record an event and return the user's updated state"""
+        timestamp = timestamp if timestamp is not None else time.time()
+        record = encode_event(user, challenge, points, kind, timestamp)
+        with self._lock:
+            with self._flock(fcntl.LOCK_SH):
+                self._reopen_if_compacted()
+                self._write([record])
+            state = self.users.setdefault(user, _empty_state())
+            apply_event(state, timestamp, points, kind)
+            self._since_snapshot += 1
+            due = self._since_snapshot >= self.snapshot_every
+            state = dict(state)
+        if due:
+            self.snapshot()
+        return state
+
+    def extend(self, events) -> int:
+        """Append many (timestamp, user, challenge, points, kind) events in one write.
+
+        Events should be in timestamp order so streaks rebuild correctly.
+        """
+        events = list(events)
+        records = [encode_event(user, challenge, points, kind, timestamp)
+                   for timestamp, user, challenge, points, kind in events]
+        with self._lock:
+            with self._flock(fcntl.LOCK_SH):
+                self._reopen_if_compacted()
+                self._write(records)
+            for timestamp, user, _, points, kind in events:
+                state = self.users.get(user)
+                if state is None:
+                    state = self.users[user] = _empty_state()
+                apply_event(state, timestamp, points, kind)
+            count = len(events)
+            self._since_snapshot += count
+            due = self._since_snapshot >= self.snapshot_every
+        if due:
+            self.snapshot()
+        return count
+
+    def user_state(self, user: str) -> dict:
+        """Current materialized state for a user, including other processes' events"""
+        with self._lock:
+            with self._flock(fcntl.LOCK_SH):
+                self._reopen_if_compacted()
+                self._catch_up()
+            return dict(self.users.get(user) or _empty_state())
+
+    def _write_snapshot(self, generation: int, offset: int):
+        tmp_path = self.snapshot_path.with_suffix(".tmp")
+        tmp_path.write_text(json.dumps({"generation": generation, "offset": offset, "users": self.users}))
+        os.replace(tmp_path, self.snapshot_path)
+
+    def snapshot(self):
+        """Persist the materialized state up to the current end of the log"""
+        with self._lock:
+            with self._flock(fcntl.LOCK_EX):
+                self._reopen_if_compacted()
+                self._catch_up()
+                self._write_snapshot(self.generation, self._synced)
+                self._since_snapshot = 0
+                due = self._synced >= max(self.compact_bytes, 2 * self._compacted_size)
+        if due:
+            self.compact()
+
+    def compact(self):
+        """Rewrite the log without events older than the retention window"""
+        cutoff = time.time() - self.retention_days * 86400
+        with self._lock, self._flock(fcntl.LOCK_EX):
+            self._reopen_if_compacted()
+            self._catch_up()
+            new_path = self._log_path(self.generation + 1)
+            with open(new_path, "wb") as out:
+                for _, timestamp, user, challenge, points, kind in self.replay():
+                    if timestamp >= cutoff:
+                        out.write(encode_event(user, challenge, points, kind, timestamp))
+                size = out.tell()
+            # The snapshot switch is the commit point of the compaction
+            self._write_snapshot(self.generation + 1, size)
+            self._file.close()
+            os.unlink(self.path)
+            self.generation += 1
+            self.path = new_path
+            self._file = open(self.path, "ab")
+            self._synced = size
+            self._compacted_size = size
+            self._since_snapshot = 0
+
+    def replay(self, offset: int = 0):
+        """Stream every event from `offset` through a read-only memory map"""
+        if self.path.stat().st_size <= offset:
+            return
+        with open(self.path, "rb") as f, mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as buffer:
+            yield from iter_records(memoryview(buffer), offset)
+
+    def close(self):
+        if self._file.closed:
+            return
+        self.snapshot()
+        with self._lock:
+            self._file.close()
@@ -1,6 +1,8 @@
 import streamlit as st
 import pandas as pd
-from transformers import pipeline
+from scoring import GREENSCORE
+from session_store import current_session_id
+from shared import load_generator, load_session_store
 
 # Title and Introduction
 st.title("🌱 GreenScore AI")
@@ -16,48 +18,24 @@ st.header("📝 Lifestyle Assessment")
 # Category 1: Transportation
 with st.expander("🚗 Transportation Habits"):
     transport = st.selectbox("How do you commute regularly?", 
-                            ["Car (Alone)", "Car (Carpool)", "Public Transport", "Bike/Walk"])
+                            GREENSCORE.options["transport"])
     st.info("**Why this matters:** Transportation accounts for 29% of greenhouse gas emissions. Switching to sustainable options can reduce your carbon footprint by up to 50%!")
 
 # Category 2: Diet
 with st.expander("🍔 Dietary Choices"):
     diet = st.selectbox("How often do you consume animal products?", 
-                       ["Daily", "3-4 times/week", "1-2 times/week", "Vegetarian/Vegan"])
+                       GREENSCORE.options["diet"])
     st.info("**Did you know?** A plant-based diet reduces food-related emissions by 73% (Oxford Study).")
 
 # Category 3: Energy
 with st.expander("💡 Home Energy Use"):
     energy = st.selectbox("Your primary energy source:", 
-                         ["Non-Renewable (Grid)", "Solar/Wind", "Mixed Renewable"])
+                         GREENSCORE.options["energy"])
     st.info("**Good to know:** Renewable energy can reduce home emissions by 80% compared to fossil fuels.")
 
 # --- Score Calculation ---
-score = 0
-
-# Transportation Scoring
-transport_scores = {
-    "Car (Alone)": 4, 
-    "Car (Carpool)": 3,
-    "Public Transport": 2,
-    "Bike/Walk": 1
-}
-
-# Diet Scoring
-diet_scores = {
-    "Daily": 4,
-    "3-4 times/week": 3,
-    "1-2 times/week": 2,
-    "Vegetarian/Vegan": 1
-}
-
-# Energy Scoring
-energy_scores = {
-    "Non-Renewable (Grid)": 3,
-    "Mixed Renewable": 2,
-    "Solar/Wind": 1
-}
-
-score = transport_scores[transport] + diet_scores[diet] + energy_scores[energy]
+result = GREENSCORE.evaluate({"transport": transport, "diet": diet, "energy": energy})
+score = result.total
 
 # --- Results Dashboard ---
 st.header("📊 Your Environmental Impact")
@@ -65,17 +43,17 @@ st.header("📊 Your Environmental Impact")
 # Visual Score Display
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("Transport Score", transport_scores[transport], help="Lower is better")
+    st.metric("Transport Score", result.scores["transport"], help="Lower is better")
 with col2:
-    st.metric("Diet Score", diet_scores[diet], help="Lower is better")
+    st.metric("Diet Score", result.scores["diet"], help="Lower is better")
 with col3:
-    st.metric("Energy Score", energy_scores[energy], help="Lower is better")
+    st.metric("Energy Score", result.scores["energy"], help="Lower is better")
 
 # Total Score with Visual Feedback
 st.subheader(f"Your Total GreenScore: {score}/9")
-if score <= 3:
+if result.tier == "Eco Champion":
     st.success("🌍 Eco Champion! You're making exceptional sustainable choices!")
-elif score <= 6:
+elif result.tier == "Green Starter":
     st.warning("🌱 Green Starter! Great foundation with room for improvement!")
 else:
     st.error("⚠️ Improvement Needed! Let's work on reducing your footprint!")
@@ -86,7 +64,7 @@ st.header("💡 Personalized Action Plan")
 # AI Feedback with Error Handling
 try:
     # Load AI Model (Lighter Model for Better Performance)
-    feedback_model = pipeline("text-generation", model="distilgpt2")
+    feedback_model = load_generator("distilgpt2")
     if feedback_model:
         feedback_prompt = f"Suggest simple eco-friendly actions for someone with these habits: Transportation={transport}, Diet={diet}, Energy={energy}. Keep it short and practical."
         ai_feedback = feedback_model(feedback_prompt, max_length=100, num_return_sequences=1)[0]['generated_text']
@@ -100,12 +78,7 @@ except Exception as e:
 # --- Achievement System ---
 st.header("🏆 Earn Eco-Badges")
 
-badges = {
-    "Green Novice": score <= 6,
-    "Public Commuter": transport in ["Public Transport", "Bike/Walk"],
-    "Plant Pioneer": diet in ["1-2 times/week", "Vegetarian/Vegan"],
-    "Energy Saver": energy != "Non-Renewable (Grid)"
-}
+badges = GREENSCORE.earned_badges(result.badges)
 
 cols = st.columns(4)
 for idx, (badge, earned) in enumerate(badges.items()):
@@ -116,17 +89,15 @@ for idx, (badge, earned) in enumerate(badges.items()):
 
 # --- Progress Tracking ---
 st.header("📈 Progress Tracker")
-if 'history' not in st.session_state:
-    st.session_state.history = []
+sessions = load_session_store()
+session_id = current_session_id()
 
 if st.button("Save Current Score"):
-    st.session_state.history.append({
-        "date": pd.Timestamp.now().strftime("%Y-%m-%d"),
-        "score": score
-    })
+    sessions.append_history(session_id, pd.Timestamp.now().date(), score)
     
-if st.session_state.history:
-    history_df = pd.DataFrame(st.session_state.history)
+history = sessions.get(session_id).history
+if len(history):
+    history_df = history.to_frame()
     st.line_chart(history_df.set_index('date'))
 else:
     st.info("Save your first score to start tracking progress!")
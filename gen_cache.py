@@ -0,0 +1,207 @@
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+
+from config import DATA_DIR
+
+GEN_CACHE_DIR = DATA_DIR / "gen_cache"
+
+
+# --- Cache Keys ---
+def normalize_prompt(prompt: str) -> str:
+    """Prompt with runs of whitespace collapsed, so reindented templates share entries.
+
+    Nothing else is rewritten: the scripts' templates differ in wording, so
+    each one has its own entries, and the text itself reaches the model as is.
+    """
+    return re.sub(r"\s+", " ", prompt).strip()
+
+
+def normalize_params(params: dict) -> dict:
+    """Generation kwargs with defaults filled in and no-op sampling knobs dropped"""
+    params = dict(params)
+    params.setdefault("num_return_sequences", 1)
+    if params.get("do_sample") is False:
+        for name in ("temperature", "top_k", "top_p"):
+            params.pop(name, None)
+    return params
+
+
+def cache_key(model: str, prompt: str, params: dict) -> str:
+    """Content address of a generation: model, normalized prompt and params"""
+    payload = json.dumps(
+        {"model": model, "prompt": normalize_prompt(prompt), "params": normalize_params(params)},
+        sort_keys=True
+    )
+    return hashlib.sha256(payload.encode()).hexdigest()
+
+
+def derive_seed(key: str) -> int:
+    """Sampling seed for a cache key, so one profile always gets the same text"""
+    return int(key[:8], 16)
+
+
+# --- Generation Cache ---
+class GenerationCache:
+    """Content-addressed cache of text-generation outputs.
+
+    An in-memory LRU of `max_entries` sits in front of a directory of small
+    JSON files shared by every app process. Disk entries expire after `ttl`
+    seconds and the least recently used are evicted once the directory
+    exceeds `max_bytes`. Only the completion after the prompt is stored, so
+    a hit for a prompt differing only in whitespace is returned with the
+    caller's own prompt.
+
+    In `deterministic` mode every generation is seeded from its cache key,
+    which makes sampled outputs reproducible and therefore cacheable. The
+    torch RNG is process-wide, so seeded generations run one at a time.
+    Without it only explicitly greedy (`do_sample=False`) calls are cached.
+    """
+
+    def __init__(self, directory=GEN_CACHE_DIR, max_entries: int = 512,
+                 max_bytes: int = 32 * 1024 * 1024, ttl: float = 7 * 24 * 3600,
+                 deterministic: bool = True):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self.deterministic = deterministic
+        self.entries = OrderedDict()
+        self.memory_hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self.bypassed = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._generate_lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        self.disk_bytes = sum(path.stat().st_size for path in self.directory.glob("*.json"))
+
+    def _path(self, key: str):
+        return self.directory / f"{key}.json"
+
+    def _remember(self, key: str, completions: list):
+        """Insert into the memory LRU (lock held)"""
+        self.entries[key] = completions
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def _read_disk(self, key: str):
+        path = self._path(key)
+        try:
+            entry = json.loads(path.read_text())
+        except (FileNotFoundError, ValueError):
+            return None
+        if time.time() - entry["created"] > self.ttl:
+            path.unlink(missing_ok=True)
+            return None
+        os.utime(path)  # mtime doubles as the disk tier's LRU clock
+        return entry["completions"]
+
+    def _write_disk(self, key: str, completions: list):
+        path = self._path(key)
+        tmp_path = path.with_suffix(f".{threading.get_ident()}.tmp")
+        tmp_path.write_text(json.dumps({"created": time.time(), "completions": completions}))
+        os.replace(tmp_path, path)
+        with self._lock:
+            self.disk_bytes += path.stat().st_size
+            if self.disk_bytes > self.max_bytes:
+                self._evict_disk()
+
+    def _evict_disk(self):
+        """Drop expired, then least recently used files down to 3/4 of the budget (lock held)"""
+        now = time.time()
+        files = []
+        for path in self.directory.glob("*.json"):
+            try:
+                stat = path.stat()
+            except FileNotFoundError:
+                continue  # Evicted by another process
+            files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        # Other processes write here too, so start from the real total
+        self.disk_bytes = sum(size for _, size, _ in files)
+        for mtime, size, path in files:
+            if self.disk_bytes <= self.max_bytes * 3 // 4 and now - mtime <= self.ttl:
+                continue
+            path.unlink(missing_ok=True)
+            self.disk_bytes -= size
+            self.evictions += 1
+
+    def lookup(self, key: str):
+        """Cached completions for a key, or None"""
+        with self._lock:
+            completions = self.entries.get(key)
+            if completions is not None:
+                self.entries.move_to_end(key)
+                self.memory_hits += 1
+                return completions
+        completions = self._read_disk(key)
+        if completions is not None:
+            with self._lock:
+                self._remember(key, completions)
+                self.disk_hits += 1
+        return completions
+
+    def generate(self, generator, model: str, prompt: str, **params) -> list:
+        """Pipeline-shaped output for `generator(prompt, **params)`, from cache when possible"""
+        if not self.deterministic and params.get("do_sample") is not False:
+            with self._lock:
+                self.bypassed += 1
+            return generator(prompt, **params)
+
+        key = cache_key(model, prompt, params)
+        completions = self.lookup(key)
+        if completions is None:
+            if self.deterministic:
+                from transformers import set_seed
+
+                with self._generate_lock:
+                    set_seed(derive_seed(key))
+                    output = generator(prompt, **params)
+            else:
+                output = generator(prompt, **params)
+            completions = [
+                item["generated_text"][len(prompt):] if item["generated_text"].startswith(prompt)
+                else item["generated_text"]
+                for item in output
+            ]
+            with self._lock:
+                self.misses += 1
+                self._remember(key, completions)
+            self._write_disk(key, completions)
+        return [{"generated_text": prompt + completion} for completion in completions]
+
+    def metrics(self) -> dict:
+        """Hit/miss counts and ratios per tier"""
+        with self._lock:
+            lookups = self.memory_hits + self.disk_hits + self.misses
+            return {
+                "memory_hits": self.memory_hits,
+                "disk_hits": self.disk_hits,
+                "misses": self.misses,
+                "bypassed": self.bypassed,
+                "hit_ratio": (self.memory_hits + self.disk_hits) / lookups if lookups else 0.0,
+                "memory_hit_ratio": self.memory_hits / lookups if lookups else 0.0,
+                "memory_entries": len(self.entries),
+                "disk_bytes": self.disk_bytes,
+                "evictions": self.evictions
+            }
+
+
+class CachedGenerator:
+    """Drop-in for a text-generation pipeline that goes through a GenerationCache"""
+
+    def __init__(self, generator, model: str, cache: GenerationCache):
+        self.generator = generator
+        self.model = model
+        self.cache = cache
+
+    def __call__(self, prompt: str, **params) -> list:
+        return self.cache.generate(self.generator, self.model, prompt, **params)
@@ -1,6 +1,16 @@
 import streamlit as st
 import pandas as pd
-from transformers import pipeline
+import uuid
+from scoring import GREENSCORE
+from session_store import current_session_id
+from shared import (load_cohort_stats, load_event_log, load_generator, load_planner, load_session_store,
+                    record_cohort)
+from event_log import SAVE
+from history_io import HistoryFormatError, history_from_file, history_to_parquet
+from profiling import finish_rerun_profile, start_rerun_profile
+
+# Opt-in: GREENEARTH_PROFILE=1 or ?profile=1 records this rerun (`memory` adds tracemalloc)
+rerun_profile = start_rerun_profile("green_ai.py")
 
 # Title and Introduction
 st.title("🌱 GreenScore AI")
@@ -16,48 +26,24 @@ st.header("📝 Lifestyle Assessment")
 # Category 1: Transportation
 with st.expander("🚗 Transportation Habits"):
     transport = st.selectbox("How do you commute regularly?", 
-                            ["Car (Alone)", "Car (Carpool)", "Public Transport", "Bike/Walk"])
+                            GREENSCORE.options["transport"])
     st.info("**Why this matters:** Transportation accounts for 29% of greenhouse gas emissions. Switching to sustainable options can reduce your carbon footprint by up to 50%!")
 
 # Category 2: Diet
 with st.expander("🍔 Dietary Choices"):
     diet = st.selectbox("How often do you consume animal products?", 
-                       ["Daily", "3-4 times/week", "1-2 times/week", "Vegetarian/Vegan"])
+                       GREENSCORE.options["diet"])
     st.info("**Did you know?** A plant-based diet reduces food-related emissions by 73% (Oxford Study).")
 
 # Category 3: Energy
 with st.expander("💡 Home Energy Use"):
     energy = st.selectbox("Your primary energy source:", 
-                         ["Non-Renewable (Grid)", "Solar/Wind", "Mixed Renewable"])
+                         GREENSCORE.options["energy"])
     st.info("**Good to know:** Renewable energy can reduce home emissions by 80% compared to fossil fuels.")
 
 # --- Score Calculation ---
-score = 0
-
-# Transportation Scoring
-transport_scores = {
-    "Car (Alone)": 4, 
-    "Car (Carpool)": 3,
-    "Public Transport": 2,
-    "Bike/Walk": 1
-}
-
-# Diet Scoring
-diet_scores = {
-    "Daily": 4,
-    "3-4 times/week": 3,
-    "1-2 times/week": 2,
-    "Vegetarian/Vegan": 1
-}
-
-# Energy Scoring
-energy_scores = {
-    "Non-Renewable (Grid)": 3,
-    "Mixed Renewable": 2,
-    "Solar/Wind": 1
-}
-
-score = transport_scores[transport] + diet_scores[diet] + energy_scores[energy]
+result = GREENSCORE.evaluate({"transport": transport, "diet": diet, "energy": energy})
+score = result.total
 
 # --- Results Dashboard ---
 st.header("📊 Your Environmental Impact")
@@ -65,17 +51,17 @@ st.header("📊 Your Environmental Impact")
 # Visual Score Display
 col1, col2, col3 = st.columns(3)
 with col1:
-    st.metric("Transport Score", transport_scores[transport], help="Lower is better")
+    st.metric("Transport Score", result.scores["transport"], help="Lower is better")
 with col2:
-    st.metric("Diet Score", diet_scores[diet], help="Lower is better")
+    st.metric("Diet Score", result.scores["diet"], help="Lower is better")
 with col3:
-    st.metric("Energy Score", energy_scores[energy], help="Lower is better")
+    st.metric("Energy Score", result.scores["energy"], help="Lower is better")
 
 # Total Score with Visual Feedback
 st.subheader(f"Your Total GreenScore: {score}/9")
-if score <= 3:
+if result.tier == "Eco Champion":
     st.success("🌍 Eco Champion! You're making exceptional sustainable choices!")
-elif score <= 6:
+elif result.tier == "Green Starter":
     st.warning("🌱 Green Starter! Great foundation with room for improvement!")
 else:
     st.error("⚠️ Improvement Needed! Let's work on reducing your footprint!")
@@ -85,7 +71,7 @@ st.header("💡 Personalized Action Plan")
 
 # AI Feedback
 try:
-    feedback_model = pipeline("text-generation", model="gpt2")
+    feedback_model = load_generator("gpt2")
     feedback_prompt = f"Provide specific, numbered recommendations to improve environmental sustainability for someone with these habits: Transportation={transport}, Diet={diet}, Energy={energy}. Focus on practical, achievable steps."
     ai_feedback = feedback_model(feedback_prompt, max_length=150)[0]['generated_text']
     st.markdown(f"""
@@ -98,12 +84,7 @@ except:
 # --- Achievement System ---
 st.header("🏆 Earn Eco-Badges")
 
-badges = {
-    "Green Novice": score <= 6,
-    "Public Commuter": transport in ["Public Transport", "Bike/Walk"],
-    "Plant Pioneer": diet in ["1-2 times/week", "Vegetarian/Vegan"],
-    "Energy Saver": energy != "Non-Renewable (Grid)"
-}
+badges = GREENSCORE.earned_badges(result.badges)
 
 cols = st.columns(4)
 for idx, (badge, earned) in enumerate(badges.items()):
@@ -112,20 +93,69 @@ for idx, (badge, earned) in enumerate(badges.items()):
                 width=40)
         st.caption(f"{'✅ ' if earned else '🔒 '}{badge}")
 
+# --- What-If Planner ---
+st.header("🧭 Your Best Next Step")
+
+planner = load_planner()
+next_step = planner.best_next_change(transport, diet, energy)
+champion_path = planner.path_to_champion(transport, diet, energy)
+
+if next_step["change"]:
+    st.info(f"**{next_step['change']}** would bring your GreenScore to {next_step['new_score']}/9 "
+            f"({next_step['new_tier']}) and save about {next_step['extra_savings_lbs']:,} lbs CO2/year.")
+if champion_path:
+    st.markdown("**Fastest path to Eco Champion:**\n" + "\n".join(
+        f"{idx}. {step}" for idx, step in enumerate(champion_path, start=1)))
+else:
+    st.success("🌍 You're already an Eco Champion - nothing left to change!")
+
 # --- Progress Tracking ---
 st.header("📈 Progress Tracker")
-if 'history' not in st.session_state:
-    st.session_state.history = []
+sessions = load_session_store()
+session_id = current_session_id()
+
+cohort = load_cohort_stats()
+events = load_event_log()
+if 'user_name' not in st.session_state:
+    st.session_state.user_name = f"Guest-{uuid.uuid4().hex[:6]}"
+user_name = st.text_input("Your name (to keep your streak):", key="user_name")
 
 if st.button("Save Current Score"):
-    st.session_state.history.append({
-        "date": pd.Timestamp.now().strftime("%Y-%m-%d"),
-        "score": score
-    })
-    
-if st.session_state.history:
-    history_df = pd.DataFrame(st.session_state.history)
+    sessions.append_history(session_id, pd.Timestamp.now().date(), score)
+    # One value per session per day: a later save replaces the earlier one
+    record_cohort("greenscore", score)
+    record_cohort("transport", result.scores["transport"])
+    record_cohort("diet", result.scores["diet"])
+    record_cohort("energy", result.scores["energy"])
+    events.append(user_name, "save", score, kind=SAVE)
+
+with st.expander("💾 Import History"):
+    uploaded = st.file_uploader("Load a history exported from GreenScore (Parquet or Arrow)",
+                                type=["parquet", "arrow", "feather"])
+    if uploaded is not None and st.session_state.get("imported_history") != uploaded.file_id:
+        try:
+            entries = history_from_file(uploaded)
+        except HistoryFormatError:
+            st.error("That file isn't a GreenScore history export (needs `date` and `score` columns).")
+        else:
+            for day, saved_score in entries:
+                sessions.append_history(session_id, day, saved_score)
+            st.session_state.imported_history = uploaded.file_id
+            st.success("History imported!")
+
+history = sessions.get(session_id).history
+if len(history):
+    greener = cohort.greener_than("greenscore", score, lower_is_better=GREENSCORE.lower_is_better)
+    st.metric("Cohort Ranking", f"Greener than {greener:.0f}% of users", help="Based on scores saved in the last 7 days")
+    st.caption(f"🔥 {events.user_state(user_name)['streak']}-day saving streak")
+
+if len(history):
+    history_df = history.to_frame()
     st.line_chart(history_df.set_index('date'))
+    # Encoded only on request, so no export bytes are held between reruns
+    if st.button("📦 Export History (Parquet)"):
+        st.download_button("⬇️ Download History", history_to_parquet(history),
+                           file_name="greenscore_history.parquet")
 else:
     st.info("Save your first score to start tracking progress!")
 
@@ -150,4 +180,6 @@ st.markdown("---")
 st.markdown("""
 *Data sources: EPA, IPCC, and Our World in Data.  
 Icons by [Icons8](https://icons8.com)*
-""")
\ No newline at end of file
+""")
+
+finish_rerun_profile(rerun_profile)
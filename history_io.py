@@ -0,0 +1,195 @@
+import argparse
+from pathlib import Path
+
+import pyarrow as pa
+import pyarrow.dataset as ds
+import pyarrow.ipc as ipc
+import pyarrow.parquet as pq
+
+from event_log import EventLog
+from session_store import ScoreHistory
+
+EVENT_SCHEMA = pa.schema([
+    ("timestamp", pa.timestamp("ms", tz="UTC")),
+    ("date", pa.date32()),
+    ("user", pa.dictionary(pa.int32(), pa.string())),
+    ("challenge", pa.dictionary(pa.int32(), pa.string())),
+    ("points", pa.int32()),
+    ("kind", pa.uint8())
+])
+
+HISTORY_SCHEMA = pa.schema([
+    ("date", pa.date32()),
+    ("score", pa.int16())
+])
+
+BATCH_ROWS = 256 * 1024
+
+
+class HistoryFormatError(ValueError):
+    """Raised when an uploaded file is not a usable Progress Tracker history"""
+
+
+# --- Tables ---
+def history_table(history: ScoreHistory) -> pa.Table:
+    """A Progress Tracker history as an Arrow table"""
+    # Day ordinals are days since 0001-01-01, date32 counts from 1970-01-01
+    days = pa.array([day - 719163 for day in history.days], pa.int32()).cast(pa.date32())
+    return pa.Table.from_arrays([days, pa.array(history.scores.tolist(), pa.int16())], schema=HISTORY_SCHEMA)
+
+
+def _event_batch(rows: list) -> pa.RecordBatch:
+    timestamps, users, challenges, points, kinds = zip(*rows)
+    stamp = pa.array([int(ts * 1000) for ts in timestamps], pa.int64()).cast(EVENT_SCHEMA.field("timestamp").type)
+    return pa.RecordBatch.from_arrays([
+        stamp,
+        stamp.cast(pa.date32()),
+        pa.array(users, pa.string()).dictionary_encode(),
+        pa.array(challenges, pa.string()).dictionary_encode(),
+        pa.array(points, pa.int32()),
+        pa.array(kinds, pa.uint8())
+    ], schema=EVENT_SCHEMA)
+
+
+def iter_event_batches(log: EventLog, batch_rows: int = BATCH_ROWS):
+    """Stream the score event log as Arrow record batches"""
+    rows = []
+    for _, timestamp, user, challenge, points, kind in log.replay():
+        rows.append((timestamp, user, challenge, points, kind))
+        if len(rows) == batch_rows:
+            yield _event_batch(rows)
+            rows = []
+    if rows:
+        yield _event_batch(rows)
+
+
+# --- Export ---
+def export_parquet(batches, directory):
+    """Write batches as a Parquet dataset partitioned by date (date=YYYY-MM-DD/)"""
+    ds.write_dataset(
+        batches, directory, schema=EVENT_SCHEMA, format="parquet",
+        partitioning=ds.partitioning(pa.schema([("date", pa.date32())]), flavor="hive"),
+        existing_data_behavior="overwrite_or_ignore"
+    )
+
+
+def _plain_strings(schema: pa.Schema) -> pa.Schema:
+    return pa.schema([
+        pa.field(field.name, field.type.value_type) if pa.types.is_dictionary(field.type) else field
+        for field in schema
+    ])
+
+
+def export_ipc(batches, path, schema: pa.Schema = EVENT_SCHEMA):
+    """Write batches to an Arrow IPC file that can be memory-mapped back.
+
+    The IPC file format allows one dictionary per column for the whole file,
+    so per-batch dictionary columns are written as plain strings.
+    """
+    schema = _plain_strings(schema)
+    with pa.OSFile(str(path), "wb") as sink, ipc.new_file(sink, schema) as writer:
+        for batch in batches:
+            columns = [column.dictionary_decode() if pa.types.is_dictionary(column.type) else column
+                       for column in batch.columns]
+            writer.write_batch(pa.RecordBatch.from_arrays(columns, schema=schema))
+
+
+def history_to_parquet(history: ScoreHistory) -> bytes:
+    """Progress Tracker history as Parquet bytes (for downloads)"""
+    sink = pa.BufferOutputStream()
+    pq.write_table(history_table(history), sink)
+    return sink.getvalue().to_pybytes()
+
+
+# --- Import ---
+def read_batches(path, columns: list = None):
+    """Stream record batches from a Parquet file/dataset or an Arrow IPC file.
+
+    IPC files are memory-mapped and their batches are zero-copy views of the
+    mapping; Parquet is read through a memory map one row group at a time.
+    Either way memory stays flat regardless of the file size.
+    """
+    path = Path(path)
+    if path.is_dir():
+        dataset = ds.dataset(path, format="parquet", partitioning="hive")
+        yield from dataset.to_batches(columns=columns, batch_size=BATCH_ROWS)
+    elif path.suffix in (".arrow", ".feather", ".ipc"):
+        with pa.memory_map(str(path), "r") as source:
+            reader = ipc.open_file(source)
+            for idx in range(reader.num_record_batches):
+                batch = reader.get_batch(idx)
+                yield batch.select(columns) if columns else batch
+    else:
+        parquet = pq.ParquetFile(str(path), memory_map=True)
+        yield from parquet.iter_batches(batch_size=BATCH_ROWS, columns=columns)
+
+
+def _strings(column) -> list:
+    """Python strings of a (possibly dictionary-encoded) column"""
+    if pa.types.is_dictionary(column.type):
+        values = column.dictionary.to_pylist()
+        return [values[idx] for idx in column.indices.to_numpy().tolist()]
+    return column.to_pylist()
+
+
+def import_events(path, log: EventLog) -> int:
+    """Re-seed an event log from an exported file; returns rows imported.
+
+    Rows are expected in timestamp order, as export writes them.
+    """
+    count = 0
+    for batch in read_batches(path, columns=["timestamp", "user", "challenge", "points", "kind"]):
+        seconds = batch.column("timestamp").cast(pa.int64()).to_numpy() / 1000
+        count += log.extend(zip(
+            seconds.tolist(),
+            _strings(batch.column("user")),
+            _strings(batch.column("challenge")),
+            batch.column("points").to_numpy().tolist(),
+            batch.column("kind").to_numpy().tolist()
+        ))
+    return count
+
+
+def history_from_file(source) -> list:
+    """(date, score) pairs from an uploaded Parquet or Arrow IPC history.
+
+    The columns are cast to HISTORY_SCHEMA with a safe cast and rows with
+    nulls are dropped; anything that does not fit raises HistoryFormatError
+    before a single entry is returned.
+    """
+    data = source.read()
+    try:
+        if data[:6] == b"ARROW1":
+            table = ipc.open_file(pa.BufferReader(data)).read_all()
+        else:
+            table = pq.read_table(pa.BufferReader(data))
+        table = table.select(HISTORY_SCHEMA.names).cast(HISTORY_SCHEMA).drop_null()
+        return list(zip(table.column("date").to_pylist(), table.column("score").to_pylist()))
+    except (pa.ArrowException, KeyError, ValueError, OverflowError) as error:
+        raise HistoryFormatError(str(error)) from error
+
+
+# --- Command Line ---
+def main():
+    parser = argparse.ArgumentParser(description="Export or import the score event log")
+    commands = parser.add_subparsers(dest="command", required=True)
+    export = commands.add_parser("export", help="Write the event log to Parquet (directory) or Arrow IPC (.arrow)")
+    export.add_argument("target")
+    load = commands.add_parser("import", help="Append an exported Parquet/IPC file to the event log")
+    load.add_argument("source")
+    args = parser.parse_args()
+
+    log = EventLog()
+    if args.command == "export":
+        if args.target.endswith((".arrow", ".feather", ".ipc")):
+            export_ipc(iter_event_batches(log), args.target)
+        else:
+            export_parquet(iter_event_batches(log), args.target)
+        print(f"Exported event log to {args.target}")
+    else:
+        print(f"Imported {import_events(args.source, log)} events")
+    log.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,232 @@
+import atexit
+import random
+import sqlite3
+import threading
+import time
+from contextlib import closing
+
+from config import DATA_DIR
+
+LEADERBOARD_PATH = DATA_DIR / "leaderboard.sqlite3"
+
+
+# --- Order-Statistics Skip List ---
+class _Node:
+    __slots__ = ("key", "next", "width")
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.next = [None] * level
+        # width[lvl] = number of level-0 steps covered by the link next[lvl]
+        self.width = [1] * level
+
+
+class RankedSkipList:
+    """Sorted keys with O(log n) insert, remove, rank and select."""
+
+    MAX_LEVEL = 24
+
+    def __init__(self):
+        self.head = _Node(None, self.MAX_LEVEL)
+        self.size = 0
+
+    def __len__(self) -> int:
+        return self.size
+
+    def _random_level(self) -> int:
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        return level
+
+    def _find(self, key):
+        """Predecessor at every level plus the level-0 position of each"""
+        chain = [None] * self.MAX_LEVEL
+        steps = [0] * self.MAX_LEVEL
+        node, position = self.head, 0
+        for lvl in reversed(range(self.MAX_LEVEL)):
+            while node.next[lvl] is not None and node.next[lvl].key < key:
+                position += node.width[lvl]
+                node = node.next[lvl]
+            chain[lvl] = node
+            steps[lvl] = position
+        return chain, steps
+
+    def insert(self, key):
+        chain, steps = self._find(key)
+        level = self._random_level()
+        node = _Node(key, level)
+        position = steps[0]
+        for lvl in range(level):
+            prev = chain[lvl]
+            offset = position - steps[lvl]
+            node.next[lvl] = prev.next[lvl]
+            prev.next[lvl] = node
+            node.width[lvl] = prev.width[lvl] - offset
+            prev.width[lvl] = offset + 1
+        for lvl in range(level, self.MAX_LEVEL):
+            chain[lvl].width[lvl] += 1
+        self.size += 1
+
+    def remove(self, key):
+        chain, _ = self._find(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        for lvl in range(len(node.next)):
+            prev = chain[lvl]
+            prev.width[lvl] += node.width[lvl] - 1
+            prev.next[lvl] = node.next[lvl]
+        for lvl in range(len(node.next), self.MAX_LEVEL):
+            chain[lvl].width[lvl] -= 1
+        self.size -= 1
+
+    def rank(self, key) -> int:
+        """0-based position of an existing key"""
+        chain, steps = self._find(key)
+        node = chain[0].next[0]
+        if node is None or node.key != key:
+            raise KeyError(key)
+        return steps[0]
+
+    def slice(self, start: int, count: int) -> list:
+        """Up to `count` keys starting at 0-based position `start`"""
+        if start >= self.size or count <= 0:
+            return []
+        node, remaining = self.head, start + 1
+        for lvl in reversed(range(self.MAX_LEVEL)):
+            while node.next[lvl] is not None and node.width[lvl] <= remaining:
+                remaining -= node.width[lvl]
+                node = node.next[lvl]
+        keys = []
+        while node is not None and len(keys) < count:
+            keys.append(node.key)
+            node = node.next[0]
+        return keys
+
+
+# --- Shared Leaderboard ---
+class Leaderboard:
+    """Process-wide challenge leaderboard with batched durable writes.
+
+    Ranks live in memory in a skip list ordered by (-points, player); point
+    increments are coalesced per player and flushed to SQLite as one
+    transaction every `flush_interval` seconds by a background thread.
+    Every `reload_interval` seconds the totals are re-read from SQLite, so
+    increments flushed by other server processes show up in the ranking.
+    """
+
+    def __init__(self, path=LEADERBOARD_PATH, flush_interval: float = 2.0, reload_interval: float = 10.0):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.reload_interval = reload_interval
+        self.points = {}
+        self.ranking = RankedSkipList()
+        self.pending = {}
+        self._lock = threading.Lock()
+        self._flush_lock = threading.Lock()
+        self._stop = threading.Event()
+
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self._connect()) as db, db:
+            db.execute("CREATE TABLE IF NOT EXISTS scores (player TEXT PRIMARY KEY, points INTEGER NOT NULL)")
+            for player, points in db.execute("SELECT player, points FROM scores"):
+                self.points[player] = points
+                self.ranking.insert((-points, player))
+        self._last_reload = time.monotonic()
+
+        self._thread = threading.Thread(target=self._flush_loop, name="leaderboard-flush", daemon=True)
+        self._thread.start()
+        atexit.register(self.close)
+
+    def _connect(self) -> sqlite3.Connection:
+        db = sqlite3.connect(self.path, timeout=30)
+        db.execute("PRAGMA journal_mode=WAL")
+        return db
+
+    def add_points(self, player: str, points: int) -> int:
+        """Add points for a player and return their new total"""
+        with self._lock:
+            old = self.points.get(player)
+            if old is not None:
+                self.ranking.remove((-old, player))
+            total = (old or 0) + points
+            self.points[player] = total
+            self.ranking.insert((-total, player))
+            self.pending[player] = self.pending.get(player, 0) + points
+        return total
+
+    def rank(self, player: str):
+        """1-based rank of a player, or None if they have no points yet"""
+        with self._lock:
+            if player not in self.points:
+                return None
+            return self.ranking.rank((-self.points[player], player)) + 1
+
+    def top(self, k: int = 10) -> list:
+        """The k best players as (rank, player, points)"""
+        with self._lock:
+            keys = self.ranking.slice(0, k)
+        return [(idx + 1, player, -neg) for idx, (neg, player) in enumerate(keys)]
+
+    def around(self, player: str, radius: int = 2) -> list:
+        """Players ranked just above and below `player`"""
+        with self._lock:
+            if player not in self.points:
+                return []
+            position = self.ranking.rank((-self.points[player], player))
+            start = max(0, position - radius)
+            keys = self.ranking.slice(start, 2 * radius + 1)
+        return [(start + idx + 1, name, -neg) for idx, (neg, name) in enumerate(keys)]
+
+    def flush(self):
+        """Write all coalesced increments in a single transaction"""
+        with self._flush_lock:
+            with self._lock:
+                batch, self.pending = self.pending, {}
+            if not batch:
+                return
+            try:
+                with closing(self._connect()) as db, db:
+                    db.executemany(
+                        "INSERT INTO scores (player, points) VALUES (?, ?) "
+                        "ON CONFLICT(player) DO UPDATE SET points = points + excluded.points",
+                        batch.items()
+                    )
+            except sqlite3.Error:
+                # Put the increments back so the next flush retries them
+                with self._lock:
+                    for player, points in batch.items():
+                        self.pending[player] = self.pending.get(player, 0) + points
+                raise
+
+    def reload(self):
+        """Re-read the totals from SQLite, keeping this process's unflushed increments"""
+        with self._flush_lock:
+            with closing(self._connect()) as db:
+                stored = dict(db.execute("SELECT player, points FROM scores"))
+            with self._lock:
+                for player, points in stored.items():
+                    total = points + self.pending.get(player, 0)
+                    old = self.points.get(player)
+                    if old == total:
+                        continue
+                    if old is not None:
+                        self.ranking.remove((-old, player))
+                    self.points[player] = total
+                    self.ranking.insert((-total, player))
+            self._last_reload = time.monotonic()
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+                if time.monotonic() - self._last_reload >= self.reload_interval:
+                    self.reload()
+            except sqlite3.Error:
+                continue
+
+    def close(self):
+        """Stop the background writer and flush what is left"""
+        self._stop.set()
+        self.flush()
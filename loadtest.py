@@ -0,0 +1,318 @@
+import argparse
+import asyncio
+import json
+import os
+import random
+import subprocess
+import sys
+import time
+import urllib.request
+
+from streamlit.proto.BackMsg_pb2 import BackMsg
+from streamlit.proto.ForwardMsg_pb2 import ForwardMsg
+from streamlit.proto.WidgetStates_pb2 import WidgetState
+from tornado.httpclient import HTTPClientError
+from tornado.websocket import WebSocketError, websocket_connect
+
+WIDGET_TYPES = {"button", "selectbox", "radio", "slider", "text_input", "download_button"}
+DEFAULT_MIX = "questionnaire=4,save=2,challenge=2,tips=1"
+
+
+# --- Results ---
+def percentile(values: list, q: float) -> float:
+    """Nearest-rank percentile of an unsorted list"""
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+class Recorder:
+    """Rerun latencies per action plus error counts"""
+
+    def __init__(self):
+        self.latencies = {}
+        self.errors = {}
+        self.completed = 0
+        self.started = time.perf_counter()
+
+    def record(self, action: str, seconds: float):
+        self.latencies.setdefault(action, []).append(seconds)
+        self.completed += 1
+
+    def error(self, kind: str):
+        self.errors[kind] = self.errors.get(kind, 0) + 1
+
+    def summary(self) -> dict:
+        elapsed = time.perf_counter() - self.started
+        everything = [value for values in self.latencies.values() for value in values]
+
+        def stats(values):
+            return {
+                "count": len(values),
+                "p50_ms": 1000 * percentile(values, 0.50),
+                "p95_ms": 1000 * percentile(values, 0.95),
+                "p99_ms": 1000 * percentile(values, 0.99)
+            }
+
+        return {
+            "duration_s": elapsed,
+            "reruns": self.completed,
+            "throughput_rps": self.completed / elapsed if elapsed else 0.0,
+            "overall": stats(everything),
+            "actions": {action: stats(values) for action, values in self.latencies.items()},
+            "errors": self.errors
+        }
+
+
+# --- Server Monitoring ---
+class ProcessSampler:
+    """Samples RSS and CPU of the server process from /proc"""
+
+    def __init__(self, pid: int, recorder: Recorder, interval: float = 1.0):
+        self.pid = pid
+        self.recorder = recorder
+        self.interval = interval
+        self.timeline = []
+        self.ticks = os.sysconf("SC_CLK_TCK")
+
+    def _cpu_ticks(self) -> int:
+        with open(f"/proc/{self.pid}/stat") as f:
+            fields = f.read().rsplit(")", 1)[1].split()
+        return int(fields[11]) + int(fields[12])  # utime + stime
+
+    def _rss_mb(self) -> float:
+        with open(f"/proc/{self.pid}/status") as f:
+            for line in f:
+                if line.startswith("VmRSS:"):
+                    return int(line.split()[1]) / 1024
+        return 0.0
+
+    async def run(self):
+        last_ticks, last_time = self._cpu_ticks(), time.perf_counter()
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                ticks, now = self._cpu_ticks(), time.perf_counter()
+                rss = self._rss_mb()
+            except OSError:
+                return
+            self.timeline.append({
+                "t_s": now - self.recorder.started,
+                "rss_mb": rss,
+                "cpu_pct": 100 * (ticks - last_ticks) / self.ticks / (now - last_time),
+                "reruns": self.recorder.completed
+            })
+            last_ticks, last_time = ticks, now
+
+
+# --- Virtual Users ---
+class VirtualUser:
+    """One simulated browser tab speaking the Streamlit websocket protocol"""
+
+    def __init__(self, url: str, recorder: Recorder, timeout: float, page: str = ""):
+        self.url = url
+        self.recorder = recorder
+        self.timeout = timeout
+        self.page = page  # page name in a multi-page app, e.g. "GreenScore_AI"
+        self.widgets = {}  # label -> (element type, element proto)
+        self.values = {}   # widget id -> WidgetState kept across reruns
+
+    async def connect(self):
+        self.ws = await websocket_connect(self.url, subprotocols=["streamlit"])
+
+    def close(self):
+        self.ws.close()
+
+    async def rerun(self, action: str, trigger: WidgetState = None):
+        """Send a rerun with the current widget values and wait for it to finish"""
+        msg = BackMsg()
+        states = list(self.values.values()) + ([trigger] if trigger else [])
+        msg.rerun_script.widget_states.widgets.extend(states)
+        # Without a page script hash the server resolves the page by name each time
+        msg.rerun_script.page_name = self.page
+        start = time.perf_counter()
+        await self.ws.write_message(msg.SerializeToString(), binary=True)
+
+        while True:
+            data = await asyncio.wait_for(self.ws.read_message(), self.timeout)
+            if data is None:
+                raise ConnectionError("Server closed the websocket")
+            forward = ForwardMsg.FromString(data)
+            kind = forward.WhichOneof("type")
+            if kind == "delta":
+                self._track(forward.delta)
+            elif kind == "page_not_found":
+                self.recorder.error("page_not_found")
+            elif kind == "script_finished":
+                if forward.script_finished == ForwardMsg.FINISHED_SUCCESSFULLY:
+                    self.recorder.record(action, time.perf_counter() - start)
+                else:
+                    self.recorder.error("script_failed")
+                return
+
+    def _track(self, delta):
+        if delta.WhichOneof("type") != "new_element":
+            return
+        element = delta.new_element
+        kind = element.WhichOneof("type")
+        if kind in WIDGET_TYPES:
+            proto = getattr(element, kind)
+            self.widgets[proto.label] = (kind, proto)
+        elif kind == "exception":
+            self.recorder.error("app_exception")
+
+    def _buttons(self, text: str) -> list:
+        return [proto for label, (kind, proto) in self.widgets.items() if kind == "button" and text in label]
+
+    def _click(self, proto) -> WidgetState:
+        state = WidgetState(id=proto.id)
+        state.trigger_value = True
+        return state
+
+    def _choices(self) -> list:
+        return [(kind, proto) for kind, proto in self.widgets.values()
+                if kind in ("selectbox", "radio", "slider") and proto.options]
+
+    async def questionnaire(self):
+        """Pick new answers for every choice widget"""
+        choices = self._choices()
+        if not choices:
+            self.recorder.error("no_widget:questionnaire")
+            return
+        for kind, proto in choices:
+            state = WidgetState(id=proto.id)
+            index = random.randrange(len(proto.options))
+            if kind == "slider":
+                state.double_array_value.data.append(index)
+            else:
+                state.int_value = index
+            self.values[proto.id] = state
+        await self.rerun("questionnaire")
+
+    async def perform(self, action: str):
+        buttons = {
+            "save": self._buttons("Save Current Score"),
+            "challenge": self._buttons("pts)"),
+            "tips": self._buttons("Eco Tips")
+        }.get(action)
+        if buttons:
+            await self.rerun(action, self._click(random.choice(buttons)))
+        elif action == "tips" and self._choices():
+            # The GreenScore apps (questionnaire pages) generate tips on every rerun
+            await self.rerun(action)
+        elif action == "questionnaire":
+            await self.questionnaire()
+        else:
+            # Not on this page: count it instead of timing an unrelated rerun
+            self.recorder.error(f"no_widget:{action}")
+
+
+async def run_user(idx: int, args, recorder: Recorder, actions: list, weights: list):
+    await asyncio.sleep(args.ramp_up * idx / args.users)
+    user = VirtualUser(args.url, recorder, args.timeout, args.page)
+    try:
+        await user.connect()
+        await user.rerun("initial")
+        for _ in range(args.iterations):
+            await asyncio.sleep(random.uniform(0, args.think_time))
+            await user.perform(random.choices(actions, weights)[0])
+    except (asyncio.TimeoutError, ConnectionError, OSError, WebSocketError, HTTPClientError) as e:
+        # Dropped or rejected sessions are what overload looks like: count them, keep going
+        recorder.error(type(e).__name__)
+    finally:
+        if hasattr(user, "ws"):
+            user.close()
+
+
+# --- Server Launch ---
+def launch_server(script: str, port: int, stub_model: bool) -> subprocess.Popen:
+    env = dict(os.environ)
+    if stub_model:
+        env["GREENEARTH_STUB_MODEL"] = "1"
+    server = subprocess.Popen(
+        [sys.executable, "-m", "streamlit", "run", script, "--server.headless", "true",
+         "--server.port", str(port), "--browser.gatherUsageStats", "false"],
+        env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    deadline = time.monotonic() + 60
+    while time.monotonic() < deadline:
+        try:
+            with urllib.request.urlopen(f"http://localhost:{port}/_stcore/health", timeout=1):
+                return server
+        except OSError:
+            time.sleep(0.5)
+    server.terminate()
+    raise RuntimeError(f"Streamlit server for {script} did not become healthy")
+
+
+async def run_load_test(args) -> dict:
+    mix = dict(item.split("=") for item in args.mix.split(","))
+    actions, weights = list(mix), [float(weight) for weight in mix.values()]
+    recorder = Recorder()
+    sampler = ProcessSampler(args.server_pid, recorder) if args.server_pid else None
+    monitor = asyncio.create_task(sampler.run()) if sampler else None
+
+    await asyncio.gather(*(run_user(idx, args, recorder, actions, weights) for idx in range(args.users)))
+
+    if monitor:
+        monitor.cancel()
+    report = recorder.summary()
+    report["users"] = args.users
+    report["server"] = sampler.timeline if sampler else []
+    return report
+
+
+def print_report(report: dict):
+    print(f"{report['users']} users, {report['reruns']} reruns in {report['duration_s']:.1f}s "
+          f"({report['throughput_rps']:.1f} reruns/s)")
+    print(f"{'action':<14} {'count':>7} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}")
+    for action, stats in [("overall", report["overall"]), *report["actions"].items()]:
+        print(f"{action:<14} {stats['count']:>7} {stats['p50_ms']:>9.1f} {stats['p95_ms']:>9.1f} {stats['p99_ms']:>9.1f}")
+    if report["errors"]:
+        print("errors:", ", ".join(f"{kind}={count}" for kind, count in report["errors"].items()))
+    if report["server"]:
+        print(f"{'t (s)':>7} {'RSS MB':>9} {'CPU %':>7} {'reruns':>8}")
+        for sample in report["server"]:
+            print(f"{sample['t_s']:>7.1f} {sample['rss_mb']:>9.1f} {sample['cpu_pct']:>7.1f} {sample['reruns']:>8}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Simulate concurrent Streamlit sessions against one host")
+    parser.add_argument("--launch", metavar="SCRIPT", help="start `streamlit run SCRIPT` locally and test it")
+    parser.add_argument("--url", help="websocket url of a running server (default: the launched one)")
+    parser.add_argument("--port", type=int, default=8599)
+    parser.add_argument("--page", default="", help="page of a multi-page app to drive, e.g. GreenScore_AI "
+                                                  "or EcoGame_Pro (default: the main script)")
+    parser.add_argument("--server-pid", type=int, help="pid to sample RSS/CPU from (default: the launched server)")
+    parser.add_argument("--stub-model", action="store_true", help="launch with GREENEARTH_STUB_MODEL=1")
+    parser.add_argument("--users", type=int, default=20)
+    parser.add_argument("--iterations", type=int, default=10, help="actions per user after the first run")
+    parser.add_argument("--think-time", type=float, default=1.0, help="max random pause between actions (s)")
+    parser.add_argument("--ramp-up", type=float, default=5.0, help="seconds over which users connect")
+    parser.add_argument("--timeout", type=float, default=120.0, help="max seconds for one rerun")
+    parser.add_argument("--mix", default=DEFAULT_MIX, help="action weights, e.g. " + DEFAULT_MIX)
+    parser.add_argument("--json", help="also write the full report to this file")
+    args = parser.parse_args()
+
+    server = None
+    if args.launch:
+        server = launch_server(args.launch, args.port, args.stub_model)
+        args.server_pid = args.server_pid or server.pid
+    args.url = args.url or f"ws://localhost:{args.port}/_stcore/stream"
+
+    try:
+        report = asyncio.run(run_load_test(args))
+    finally:
+        if server:
+            server.terminate()
+            server.wait()
+
+    print_report(report)
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
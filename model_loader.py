@@ -0,0 +1,183 @@
+import argparse
+import json
+import mmap
+import os
+import struct
+import threading
+import warnings
+from contextlib import contextmanager
+
+import torch
+from huggingface_hub import hf_hub_download
+from torch import nn
+
+# safetensors dtype tags -> torch dtypes
+DTYPES = {
+    "F64": torch.float64,
+    "F32": torch.float32,
+    "F16": torch.float16,
+    "BF16": torch.bfloat16,
+    "I64": torch.int64,
+    "I32": torch.int32,
+    "I16": torch.int16,
+    "I8": torch.int8,
+    "U8": torch.uint8,
+    "BOOL": torch.bool
+}
+
+# Keeps every mapping alive for the life of the process; the tensors point into them
+_MAPPINGS = {}
+
+# The meta-parameter patch is process-wide, so only one model is built under it at a time
+_META_LOCK = threading.Lock()
+
+
+# --- Safetensors ---
+def map_safetensors(path) -> dict:
+    """Tensors of a .safetensors file as views of a read-only memory map.
+
+    Nothing is read or copied up front: pages fault in from the OS page cache
+    on first use, and every process mapping the same file shares them. The
+    tensors are read-only; writing to one crashes the process.
+    """
+    # Resolved so the hub cache's snapshot symlinks and /proc/*/smaps agree
+    path = os.path.realpath(path)
+    if path not in _MAPPINGS:
+        with open(path, "rb") as f:
+            _MAPPINGS[path] = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    buffer = _MAPPINGS[path]
+
+    # Layout: u64 header length, JSON header, then the raw tensor bytes
+    (header_len,) = struct.unpack_from("<Q", buffer, 0)
+    header = json.loads(buffer[8:8 + header_len])
+    header.pop("__metadata__", None)
+    data_start = 8 + header_len
+
+    tensors = {}
+    with warnings.catch_warnings():
+        # frombuffer warns that the mapping is not writable, which is the point
+        warnings.simplefilter("ignore", UserWarning)
+        for name, info in header.items():
+            dtype = DTYPES[info["dtype"]]
+            begin, end = info["data_offsets"]
+            count = (end - begin) // dtype.itemsize
+            if count == 0:
+                tensors[name] = torch.empty(info["shape"], dtype=dtype)
+                continue
+            flat = torch.frombuffer(buffer, dtype=dtype, count=count, offset=data_start + begin)
+            tensors[name] = flat.view(info["shape"])
+    return tensors
+
+
+@contextmanager
+def _parameters_on_meta():
+    """Create parameters on the meta device (no memory) while keeping buffers real.
+
+    The patch is on nn.Module itself, so it only acts in the thread that
+    applied it; models other sessions build meanwhile keep real parameters.
+    """
+    with _META_LOCK:
+        register = nn.Module.register_parameter
+        owner = threading.get_ident()
+
+        def register_on_meta(module, name, param):
+            register(module, name, param)
+            if param is not None and threading.get_ident() == owner:
+                module._parameters[name] = nn.Parameter(param.to("meta"), requires_grad=False)
+
+        nn.Module.register_parameter = register_on_meta
+        try:
+            yield
+        finally:
+            nn.Module.register_parameter = register
+
+
+# --- Models ---
+def load_mapped_model(model: str):
+    """Causal LM whose weights are the memory-mapped safetensors, in their stored dtype"""
+    from transformers import AutoConfig, AutoModelForCausalLM
+    from transformers.modeling_utils import no_init_weights
+
+    weights = map_safetensors(hf_hub_download(repo_id=model, filename="model.safetensors"))
+    config = AutoConfig.from_pretrained(model)
+    with no_init_weights(), _parameters_on_meta():
+        lm = AutoModelForCausalLM.from_config(config)
+
+    # Hub checkpoints of gpt2/distilgpt2 store the base model without its prefix
+    expected = set(lm.state_dict())
+    prefix = lm.base_model_prefix + "."
+    state = {}
+    for name, tensor in weights.items():
+        if name in expected:
+            state[name] = tensor
+        elif prefix + name in expected:
+            state[prefix + name] = tensor
+
+    # assign=True swaps the mapped tensors in instead of copying into the meta params
+    lm.load_state_dict(state, strict=False, assign=True)
+    lm.tie_weights()
+    missing = [name for name, param in lm.named_parameters() if param.is_meta]
+    if missing:
+        raise RuntimeError(f"{model}: no weights in model.safetensors for {', '.join(missing)}")
+    lm.requires_grad_(False)
+    return lm.eval()
+
+
+def load_mapped_pipeline(model: str):
+    """Text-generation pipeline backed by memory-mapped weights"""
+    from transformers import AutoTokenizer, pipeline
+
+    return pipeline(
+        "text-generation",
+        model=load_mapped_model(model),
+        tokenizer=AutoTokenizer.from_pretrained(model),
+        framework="pt",
+        device=-1
+    )
+
+
+# --- Memory Report ---
+def memory_report(pid: str = "self") -> dict:
+    """Private vs shared resident memory of a process, in MB.
+
+    `weights_mb` is the resident part of the weight files mapped by this
+    module (or any .safetensors mapping in another process). Those pages
+    are clean page cache: shared with every other process mapping the same
+    file and reclaimable by the kernel, even when only one process maps them
+    and the kernel still counts them as private.
+    """
+    report = {"rss_mb": 0.0, "pss_mb": 0.0, "private_mb": 0.0, "shared_mb": 0.0, "weights_mb": 0.0}
+    fields = {"Rss": "rss_mb", "Pss": "pss_mb",
+              "Private_Clean": "private_mb", "Private_Dirty": "private_mb",
+              "Shared_Clean": "shared_mb", "Shared_Dirty": "shared_mb"}
+
+    in_weights = False
+    with open(f"/proc/{pid}/smaps") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if "-" in key and " " in key:
+                # Mapping header: address range, perms, offset, dev, inode, path
+                parts = line.split(maxsplit=5)
+                path = parts[5].strip() if len(parts) > 5 else ""
+                in_weights = path in _MAPPINGS or path.endswith(".safetensors")
+                continue
+            if key in fields:
+                report[fields[key]] += int(value.split()[0]) / 1024
+                if key == "Rss" and in_weights:
+                    report["weights_mb"] += int(value.split()[0]) / 1024
+    return report
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Load a model from memory-mapped weights and report memory")
+    parser.add_argument("model", nargs="?", default="gpt2")
+    args = parser.parse_args()
+
+    generator = load_mapped_pipeline(args.model)
+    generator("Eco tip:", max_new_tokens=20, do_sample=False)
+    for key, value in memory_report().items():
+        print(f"{key:<11} {value:8.1f}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,3 @@
+from shared import run_variant
+
+run_variant("greenscore_ai.py")
@@ -0,0 +1,57 @@
+import pandas as pd
+import streamlit as st
+
+from bench_pages import measure_mapped, run_benchmark
+from shared import load_generation_cache, load_session_store
+
+st.title("📈 Multi-Page Benchmark")
+st.markdown("""
+Starts a fresh process for each app, the way they ran as separate servers,
+then one process loading every distinct model once. Each process only imports
+Streamlit and loads its models, so the single-process figures are a model-only
+estimate of this multi-page app, not a measurement of the running server.
+""")
+
+if st.button("▶️ Run Benchmark"):
+    with st.spinner("Loading models in fresh processes... this takes a minute"):
+        report = run_benchmark()
+
+    st.dataframe(pd.DataFrame(report["rows"]), hide_index=True)
+    col1, col2 = st.columns(2)
+    col1.metric("Memory (separate → one process, models only)",
+                f"{report['shared']['rss_mb']:.0f} MB",
+                f"-{report['rss_saved_mb']:.0f} MB vs {report['separate']['rss_mb']:.0f} MB",
+                delta_color="inverse")
+    col2.metric("Startup (separate → one process, models only)",
+                f"{report['shared']['startup_s']:.1f}s",
+                f"-{report['startup_saved_s']:.1f}s vs {report['separate']['startup_s']:.1f}s",
+                delta_color="inverse")
+
+st.header("⚡ Compiled Decode")
+st.markdown("""
+Per-token greedy decode latency of the `transformers` pipeline against the
+static-shape KV cache path enabled with `GREENEARTH_COMPILED_DECODE=1`.
+""")
+if st.button("▶️ Benchmark Decode"):
+    from compiled_decode import benchmark
+
+    with st.spinner("Loading and compiling distilgpt2 and gpt2..."):
+        reports = [benchmark(model) for model in ("distilgpt2", "gpt2")]
+    st.dataframe(pd.DataFrame(reports).round(2), hide_index=True)
+
+st.header("🗺️ Memory-Mapped Weights")
+st.markdown("""
+Loads gpt2 in three processes with `GREENEARTH_MMAP_WEIGHTS=1`. The weights
+stay in the OS page cache and are mapped read-only by each process, so they
+count as shared instead of private memory.
+""")
+if st.button("▶️ Measure Shared Weights"):
+    with st.spinner("Loading gpt2 in three processes..."):
+        reports = measure_mapped("gpt2")
+    st.dataframe(pd.DataFrame(reports).round(1), hide_index=True)
+
+st.header("🧠 Session Store")
+st.json(load_session_store().metrics())
+
+st.header("🗃️ Generation Cache")
+st.json(load_generation_cache().metrics())
@@ -0,0 +1,57 @@
+import pandas as pd
+import streamlit as st
+
+from profiling import PROFILE_DIR, load_profiles
+
+st.title("🔬 Rerun Profiles")
+st.markdown("""
+Start the server with `GREENEARTH_PROFILE=1`, or open a page with `?profile=1`,
+to record a sampling CPU profile of every rerun of GreenScore AI and EcoGame Pro.
+Use `memory` instead of `1` to also take tracemalloc snapshots; tracing slows
+every rerun in the process down, so compare wall times of untraced reruns only.
+Each `.folded` file opens in speedscope or `flamegraph.pl`; the `.tracemalloc`
+snapshots load with `tracemalloc.Snapshot.load`.
+""")
+
+profiles = load_profiles()
+if not profiles:
+    st.info(f"No profiles yet in `{PROFILE_DIR}`.")
+    st.stop()
+
+# --- Slowest Reruns ---
+st.header("🐢 Slowest Reruns")
+slowest = sorted(profiles, key=lambda entry: entry["wall_ms"], reverse=True)[:20]
+st.dataframe(pd.DataFrame([{
+    "Profile": entry["name"],
+    "Script": entry["script"],
+    "Wall (ms)": round(entry["wall_ms"], 1),
+    "Samples": entry["samples"],
+    "Memory traced": entry.get("memory_traced", True),
+    "Peak (KB)": round(entry["peak_kb"]) if "peak_kb" in entry else None,
+    "Completed": entry["completed"],
+    "Hottest app line": entry["top_frames"]["app"][0][0] if entry["top_frames"]["app"] else ""
+} for entry in slowest]), hide_index=True)
+
+# --- Rerun Details ---
+st.header("🔎 Rerun Details")
+chosen = st.selectbox("Profile", [entry["name"] for entry in slowest])
+entry = next(entry for entry in slowest if entry["name"] == chosen)
+
+col1, col2 = st.columns(2)
+with col1:
+    st.markdown("**App lines (samples)**")
+    st.table(pd.DataFrame(entry["top_frames"]["app"], columns=["Frame", "Samples"]))
+with col2:
+    st.markdown("**Hottest frames (self samples)**")
+    st.table(pd.DataFrame(entry["top_frames"]["self"], columns=["Frame", "Samples"]))
+
+if "allocations" in entry:
+    st.markdown("**Largest allocation growth**")
+    st.table(pd.DataFrame(entry["allocations"]).round(1))
+
+folded_path = PROFILE_DIR / f"{chosen}.folded"
+if folded_path.exists():
+    st.download_button("📥 Download Flame Graph Stacks", folded_path.read_bytes(),
+                       file_name=f"{chosen}.folded")
+else:
+    st.warning("This profile was pruned since the list was loaded; refresh to see the latest ones.")
@@ -0,0 +1,262 @@
+import json
+import os
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from contextlib import contextmanager
+from pathlib import Path
+
+import streamlit as st
+
+from config import DATA_DIR
+
+PROFILE_DIR = DATA_DIR / "profiles"
+ROOT = Path(__file__).parent
+
+# The profiler's own bookkeeping is left out of the allocation snapshots
+SNAPSHOT_FILTERS = [tracemalloc.Filter(False, __file__), tracemalloc.Filter(False, tracemalloc.__file__)]
+
+_tracing = {"reruns": 0, "started_by_us": False}
+_tracing_lock = threading.Lock()
+_active = threading.local()
+
+
+def profiling_mode():
+    """None, "cpu" or "memory", from GREENEARTH_PROFILE or a `?profile=` query parameter.
+
+    `1` records the CPU sampler only; `memory` adds tracemalloc snapshots,
+    which slow every rerun in the process down while any is being traced.
+    """
+    modes = {"1": "cpu", "memory": "memory"}
+    mode = modes.get(os.environ.get("GREENEARTH_PROFILE"))
+    if mode is not None:
+        return mode
+    try:
+        return modes.get(st.query_params.get("profile"))
+    except Exception:
+        return None  # Not running under a Streamlit session
+
+
+def profiling_enabled() -> bool:
+    return profiling_mode() is not None
+
+
+def _frame_name(code, lineno: int) -> str:
+    return f"{code.co_name} ({Path(code.co_filename).name}:{lineno})"
+
+
+# --- Rerun Profiler ---
+class RerunProfiler:
+    """Sampling CPU profile, plus tracemalloc snapshots, for one script rerun.
+
+    A background thread samples the script thread's stack every `interval`
+    seconds and counts the stacks in folded form (`root;...;leaf count`),
+    which flamegraph.pl, speedscope and inferno read directly. With
+    `trace_memory`, tracemalloc snapshots are taken at the start and end of
+    the rerun; it traces the whole process, so reruns of other sessions
+    running at the same time show up in the allocation diff and are slowed
+    down too. Wall times of memory-traced reruns are not comparable with
+    untraced ones.
+
+    The rerun is over when `finish()` is called or when `frame` (the script's
+    own frame) leaves the thread's stack, which is how reruns interrupted by
+    a newer rerun or `st.stop()` end. Either way the profile is written to
+    `directory` and summarized in `index.jsonl`.
+    """
+
+    def __init__(self, script: str, directory=PROFILE_DIR, interval: float = 0.005,
+                 trace_memory: bool = False, trace_frames: int = 1, max_profiles: int = 200):
+        self.script = script
+        self.directory = directory
+        self.interval = interval
+        self.trace_memory = trace_memory
+        self.trace_frames = trace_frames
+        self.max_profiles = max_profiles
+        self.thread_id = threading.get_ident()
+        self.stacks = Counter()
+        self.samples = 0
+        self.completed = True
+        self.done = threading.Event()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def start(self, frame):
+        self.frame = frame
+        if self.trace_memory:
+            with _tracing_lock:
+                if _tracing["reruns"] == 0 and not tracemalloc.is_tracing():
+                    tracemalloc.start(self.trace_frames)
+                    _tracing["started_by_us"] = True
+                _tracing["reruns"] += 1
+            tracemalloc.reset_peak()
+            self.first_snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+        self.started = time.time()
+        self.begin = time.perf_counter()
+        self.sampler = threading.Thread(target=self._run, name=f"profiler-{self.script}", daemon=True)
+        self.sampler.start()
+        return self
+
+    def finish(self):
+        """End the rerun's profile and wait for it to be written"""
+        self.wall = time.perf_counter() - self.begin
+        self.done.set()
+        self.sampler.join()
+
+    def abandon(self):
+        """End the profile of a rerun that stopped early, without waiting"""
+        if self.done.is_set() or not self.completed:
+            return
+        self.wall = time.perf_counter() - self.begin
+        self.completed = False
+        self.done.set()
+
+    def on_stack(self, frame) -> bool:
+        while frame is not None:
+            if frame is self.frame:
+                return True
+            frame = frame.f_back
+        return False
+
+    def _run(self):
+        while not self.done.wait(self.interval):
+            frame = sys._current_frames().get(self.thread_id)
+            if not self.on_stack(frame):
+                self.wall = time.perf_counter() - self.begin
+                self.completed = False
+                break
+            stack = []
+            while frame is not None:
+                stack.append(_frame_name(frame.f_code, frame.f_lineno))
+                frame = frame.f_back
+            self.stacks[";".join(reversed(stack))] += 1
+            self.samples += 1
+        self.frame = None
+        self._write()
+
+    def _stop_tracing(self):
+        with _tracing_lock:
+            _tracing["reruns"] -= 1
+            if _tracing["reruns"] == 0 and _tracing["started_by_us"]:
+                tracemalloc.stop()
+                _tracing["started_by_us"] = False
+
+    def top_frames(self, limit: int = 10) -> dict:
+        """Hottest leaf frames (self time) and app-code lines.
+
+        Each sample counts for the innermost frame in this repo's modules, the
+        app line that was running, directly or through pandas/transformers/streamlit.
+        """
+        app_files = {path.name for path in ROOT.glob("*.py")}
+        self_samples, app_samples = Counter(), Counter()
+        for stack, count in self.stacks.items():
+            frames = stack.split(";")
+            self_samples[frames[-1]] += count
+            for frame in reversed(frames):
+                if frame.rsplit("(", 1)[-1].split(":")[0] in app_files:
+                    app_samples[frame] += count
+                    break
+        return {"self": self_samples.most_common(limit), "app": app_samples.most_common(limit)}
+
+    def _write(self):
+        if self.trace_memory:
+            _, peak = tracemalloc.get_traced_memory()
+            last_snapshot = tracemalloc.take_snapshot().filter_traces(SNAPSHOT_FILTERS)
+            self._stop_tracing()
+
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(self.started))
+        millis = int(self.started * 1000) % 1000
+        name = f"{stamp}.{millis:03d}-{Path(self.script).stem}-{self.thread_id % 100000:05d}"
+        folded_path = self.directory / f"{name}.folded"
+        folded_path.write_text("".join(f"{stack} {count}\n" for stack, count in self.stacks.items()))
+
+        entry = {
+            "name": name,
+            "script": self.script,
+            "started": self.started,
+            "wall_ms": 1000 * self.wall,
+            "samples": self.samples,
+            "completed": self.completed,
+            "memory_traced": self.trace_memory,
+            "top_frames": self.top_frames()
+        }
+        if self.trace_memory:
+            last_snapshot.dump(str(self.directory / f"{name}.tracemalloc"))
+            entry["peak_kb"] = peak / 1024
+            entry["allocations"] = [
+                {"where": str(stat.traceback[0]), "size_kb": stat.size_diff / 1024, "count": stat.count_diff}
+                for stat in last_snapshot.compare_to(self.first_snapshot, "lineno")[:10]
+            ]
+        with _tracing_lock, open(self.directory / "index.jsonl", "a") as f:
+            f.write(json.dumps(entry) + "\n")
+        self._prune()
+
+    def _prune(self):
+        """Keep only the newest `max_profiles` profiles on disk, and in the index"""
+        folded = sorted(self.directory.glob("*.folded"))
+        pruned = folded[:-self.max_profiles]
+        if not pruned:
+            return
+        for path in pruned:
+            path.unlink(missing_ok=True)
+            path.with_suffix(".tracemalloc").unlink(missing_ok=True)
+        with _tracing_lock:
+            index = self.directory / "index.jsonl"
+            # Oldest first, as appended; load_profiles skips the pruned entries
+            kept = load_profiles(self.directory)[::-1]
+            tmp_path = index.with_suffix(f".{threading.get_ident()}.tmp")
+            tmp_path.write_text("".join(json.dumps(entry) + "\n" for entry in kept))
+            os.replace(tmp_path, index)
+
+
+def start_rerun_profile(script: str, frame=None):
+    """Start profiling this rerun if enabled; returns the profiler or None.
+
+    The rerun lasts while `frame` (default: the caller's) is running.
+    """
+    mode = profiling_mode()
+    if mode is None:
+        return None
+    current = getattr(_active, "profiler", None)
+    if current is not None and current.sampler.is_alive():
+        if current.on_stack(sys._getframe()):
+            return None  # Already inside a profiled rerun
+        current.abandon()
+    _active.profiler = RerunProfiler(script, trace_memory=mode == "memory").start(frame or sys._getframe(1))
+    return _active.profiler
+
+
+def finish_rerun_profile(profiler):
+    if profiler is not None:
+        if getattr(_active, "profiler", None) is profiler:
+            _active.profiler = None
+        profiler.finish()
+
+
+@contextmanager
+def profile_rerun(script: str):
+    """Profile the enclosed block as one rerun when profiling is enabled"""
+    # Frames: this generator, contextlib's __enter__, then the `with` statement
+    profiler = start_rerun_profile(script, sys._getframe(2))
+    try:
+        yield profiler
+    finally:
+        finish_rerun_profile(profiler)
+
+
+# --- Reading Profiles ---
+def load_profiles(directory=PROFILE_DIR) -> list:
+    """Index entries of the profiles still on disk, newest first"""
+    index = directory / "index.jsonl"
+    if not index.exists():
+        return []
+    entries = []
+    with open(index) as f:
+        for line in f:
+            try:
+                entry = json.loads(line)
+            except ValueError:
+                continue  # Torn line from a crash mid-write
+            if (directory / f"{entry['name']}.folded").exists():
+                entries.append(entry)
+    return entries[::-1]
@@ -0,0 +1,244 @@
+import itertools
+from collections import namedtuple
+
+import numpy as np
+import pandas as pd
+
+# --- Declarative Schemas ---
+# Options are listed in the order the apps show them. Tiers are checked top to
+# bottom, the first one whose bound holds wins and the last one is the fallback.
+# A badge is earned when all of its conditions hold: a score bound
+# (max_score/min_score) and/or an option rule on one category
+# (options = any of, exclude = none of).
+SCHEMAS = {
+    "greenscore": {
+        "lower_is_better": True,
+        "categories": [
+            {"key": "transport", "label": "Transport", "options": {
+                "Car (Alone)": 4,
+                "Car (Carpool)": 3,
+                "Public Transport": 2,
+                "Bike/Walk": 1
+            }},
+            {"key": "diet", "label": "Diet", "options": {
+                "Daily": 4,
+                "3-4 times/week": 3,
+                "1-2 times/week": 2,
+                "Vegetarian/Vegan": 1
+            }},
+            {"key": "energy", "label": "Energy", "options": {
+                "Non-Renewable (Grid)": 3,
+                "Solar/Wind": 1,
+                "Mixed Renewable": 2
+            }}
+        ],
+        "tiers": [
+            {"name": "Eco Champion", "max_score": 3},
+            {"name": "Green Starter", "max_score": 6},
+            {"name": "Improvement Needed"}
+        ],
+        "badges": [
+            {"name": "Green Novice", "max_score": 6},
+            {"name": "Public Commuter", "category": "transport", "options": ["Public Transport", "Bike/Walk"]},
+            {"name": "Plant Pioneer", "category": "diet", "options": ["1-2 times/week", "Vegetarian/Vegan"]},
+            {"name": "Energy Saver", "category": "energy", "exclude": ["Non-Renewable (Grid)"]}
+        ]
+    },
+    "ecogame": {
+        "lower_is_better": False,
+        "categories": [
+            {"key": "transport", "label": "Transport", "options": {
+                "Car": 1,
+                "Bus/Train": 2,
+                "Bike/Walk": 3
+            }},
+            {"key": "diet", "label": "Diet", "options": {
+                "Daily": 1,
+                "Weekly": 2,
+                "Sometimes": 3,
+                "Never": 3
+            }},
+            {"key": "energy", "label": "Energy", "options": {
+                "Regular Power": 1,
+                "Some Green Energy": 2,
+                "All Renewable": 3
+            }}
+        ],
+        "tiers": [
+            {"name": "Eco Champion", "min_score": 7},
+            {"name": "Good Start", "min_score": 4},
+            {"name": "Room for Growth"}
+        ],
+        "badges": []
+    }
+}
+
+Evaluation = namedtuple("Evaluation", ["scores", "total", "tier", "badges"])
+
+
+class SchemaError(ValueError):
+    """Raised when a scoring schema is malformed"""
+
+
+def validate_schema(schema: dict):
+    """Check a schema's structure before it is compiled"""
+    categories = schema.get("categories")
+    if not categories:
+        raise SchemaError("Schema needs at least one category")
+    keys = [category.get("key") for category in categories]
+    if len(set(keys)) != len(keys) or None in keys:
+        raise SchemaError("Category keys must be present and unique")
+    for category in categories:
+        options = category.get("options")
+        if not options:
+            raise SchemaError(f"Category '{category['key']}' has no options")
+        if not all(isinstance(points, int) for points in options.values()):
+            raise SchemaError(f"Category '{category['key']}' points must be integers")
+
+    tiers = schema.get("tiers")
+    if not tiers:
+        raise SchemaError("Schema needs at least one tier")
+    if any("max_score" in tier or "min_score" in tier for tier in tiers[-1:]):
+        raise SchemaError("The last tier is the fallback and takes no bound")
+
+    for badge in schema.get("badges", []):
+        if "name" not in badge:
+            raise SchemaError("Every badge needs a name")
+        if "category" in badge:
+            if badge["category"] not in keys:
+                raise SchemaError(f"Badge '{badge['name']}' uses unknown category '{badge['category']}'")
+            known = categories[keys.index(badge["category"])]["options"]
+            for option in badge.get("options", []) + badge.get("exclude", []):
+                if option not in known:
+                    raise SchemaError(f"Badge '{badge['name']}' uses unknown option '{option}'")
+        elif "options" in badge or "exclude" in badge:
+            raise SchemaError(f"Badge '{badge['name']}' has option rules but no category")
+
+
+def _bounds_hold(rule: dict, total: int) -> bool:
+    return total <= rule.get("max_score", total) and total >= rule.get("min_score", total)
+
+
+# --- Compiled Evaluator ---
+class CompiledSchema:
+    """Schema compiled into integer option codes and lookup tables.
+
+    Every combination of options gets a mixed-radix index; its total, tier
+    code and badge bitmask are precomputed, so evaluating a user (or a whole
+    DataFrame of users) is only code lookups.
+    """
+
+    def __init__(self, name: str, schema: dict):
+        validate_schema(schema)
+        self.name = name
+        self.lower_is_better = schema["lower_is_better"]
+        self.keys = [category["key"] for category in schema["categories"]]
+        self.labels = {category["key"]: category["label"] for category in schema["categories"]}
+        self.options = {category["key"]: list(category["options"]) for category in schema["categories"]}
+        self.codes = {key: {option: code for code, option in enumerate(options)}
+                      for key, options in self.options.items()}
+        self.points = {category["key"]: np.array(list(category["options"].values()), dtype=np.int16)
+                       for category in schema["categories"]}
+        self.radix = [len(self.options[key]) for key in self.keys]
+        self.tiers = [tier["name"] for tier in schema["tiers"]]
+        self._tier_rules = schema["tiers"]
+        self.badges = [badge["name"] for badge in schema.get("badges", [])]
+
+        best = min if self.lower_is_better else max
+        worst = max if self.lower_is_better else min
+        self.best_score = sum(int(best(self.points[key])) for key in self.keys)
+        self.worst_score = sum(int(worst(self.points[key])) for key in self.keys)
+
+        # Per-option badge masks for the option rules
+        option_masks = {key: np.zeros(len(self.options[key]), dtype=np.int64) for key in self.keys}
+        score_rules = []
+        for bit, badge in enumerate(schema.get("badges", [])):
+            for key in self.keys:
+                allowed = badge.get("options", self.options[key]) if badge.get("category") == key else self.options[key]
+                excluded = badge.get("exclude", []) if badge.get("category") == key else []
+                for option in allowed:
+                    if option not in excluded:
+                        option_masks[key][self.codes[key][option]] |= 1 << bit
+            score_rules.append((bit, badge))
+
+        # Full lattice of totals, tiers and badges
+        size = int(np.prod(self.radix))
+        self.total = np.zeros(size, dtype=np.int32)
+        self.tier_code = np.zeros(size, dtype=np.int8)
+        self.badge_mask = np.zeros(size, dtype=np.int64)
+        for flat, combo in enumerate(itertools.product(*(range(n) for n in self.radix))):
+            total = sum(int(self.points[key][code]) for key, code in zip(self.keys, combo))
+            mask = -1
+            for key, code in zip(self.keys, combo):
+                mask &= int(option_masks[key][code])
+            for bit, badge in score_rules:
+                if not _bounds_hold(badge, total):
+                    mask &= ~(1 << bit)
+            self.total[flat] = total
+            self.badge_mask[flat] = mask
+            self.tier_code[flat] = self._tier_index(total)
+
+    def score(self, key: str, option: str) -> int:
+        """Points for one option (KeyError if it is not in the schema)"""
+        return int(self.points[key][self.codes[key][option]])
+
+    def tier(self, total: int) -> str:
+        """Tier name for a total score"""
+        return self.tiers[self._tier_index(total)]
+
+    def _tier_index(self, total: int) -> int:
+        return next(idx for idx, rule in enumerate(self._tier_rules) if _bounds_hold(rule, total))
+
+    def encode(self, choice: dict) -> int:
+        """Mixed-radix lattice index of a choice (KeyError on unknown options)"""
+        flat = 0
+        for key, size in zip(self.keys, self.radix):
+            flat = flat * size + self.codes[key][choice[key]]
+        return flat
+
+    def evaluate(self, choice: dict) -> Evaluation:
+        """Score one user's choices"""
+        flat = self.encode(choice)
+        return Evaluation(
+            scores={key: self.score(key, choice[key]) for key in self.keys},
+            total=int(self.total[flat]),
+            tier=self.tiers[self.tier_code[flat]],
+            badges=int(self.badge_mask[flat])
+        )
+
+    def encode_bulk(self, frame: pd.DataFrame):
+        """Vectorized lattice indices for a DataFrame, plus a validity mask"""
+        flat = np.zeros(len(frame), dtype=np.int64)
+        valid = np.ones(len(frame), dtype=bool)
+        for key, size in zip(self.keys, self.radix):
+            codes = pd.Categorical(frame[key], categories=self.options[key]).codes.astype(np.int64)
+            valid &= codes >= 0
+            flat = flat * size + np.maximum(codes, 0)
+        return flat, valid
+
+    def evaluate_bulk(self, frame: pd.DataFrame) -> pd.DataFrame:
+        """Score every row of a DataFrame with transport/diet/energy columns"""
+        flat, valid = self.encode_bulk(frame)
+        result = pd.DataFrame({
+            "score": self.total[flat],
+            "tier": np.array(self.tiers, dtype=object)[self.tier_code[flat]],
+            "badges": self.badge_mask[flat]
+        }, index=frame.index)
+        return result.where(pd.Series(valid, index=frame.index), axis=0)
+
+    def earned_badges(self, mask: int) -> dict:
+        """Badge name -> earned flag, in schema order"""
+        return {name: bool(mask & (1 << bit)) for bit, name in enumerate(self.badges)}
+
+    def badge_names(self, mask: int) -> list:
+        return [name for name, earned in self.earned_badges(mask).items() if earned]
+
+
+def compile_schema(name: str, schema: dict = None) -> CompiledSchema:
+    """Validate and compile a schema (a built-in one by default)"""
+    return CompiledSchema(name, schema if schema is not None else SCHEMAS[name])
+
+
+# Compiled once at import and shared by every app
+GREENSCORE = compile_schema("greenscore")
+ECOGAME = compile_schema("ecogame")
@@ -0,0 +1,202 @@
+import os
+import struct
+import threading
+import time
+import uuid
+from array import array
+from collections import OrderedDict
+from datetime import date
+
+import pandas as pd
+import streamlit as st
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+from config import DATA_DIR
+
+SESSIONS_DIR = DATA_DIR / "sessions"
+
+# Spill file header: challenge score, number of history entries
+SPILL_HEADER = struct.Struct("<qI")
+# Fixed per-session bookkeeping cost counted against the budgets
+SESSION_OVERHEAD = 256
+
+
+def current_session_id() -> str:
+    """Id of the Streamlit session running this script"""
+    ctx = get_script_run_ctx()
+    if ctx is not None:
+        return ctx.session_id
+    if "session_id" not in st.session_state:
+        st.session_state.session_id = uuid.uuid4().hex
+    return st.session_state.session_id
+
+
+# --- Compact History ---
+class ScoreHistory:
+    """Saved scores as two typed arrays instead of a list of dicts.
+
+    Each entry costs 6 bytes (day ordinal + score) rather than a dict with
+    two string keys. Once `max_entries` is reached the oldest entry is dropped.
+    """
+
+    def __init__(self, max_entries: int = 365):
+        self.max_entries = max_entries
+        self.days = array("i")
+        self.scores = array("h")
+
+    def __len__(self) -> int:
+        return len(self.scores)
+
+    def append(self, day: date, score: int):
+        if len(self.scores) >= self.max_entries:
+            del self.days[0]
+            del self.scores[0]
+        self.days.append(day.toordinal())
+        self.scores.append(score)
+
+    @property
+    def nbytes(self) -> int:
+        return len(self.days) * self.days.itemsize + len(self.scores) * self.scores.itemsize
+
+    def to_frame(self) -> pd.DataFrame:
+        """History as the date/score frame the Progress Tracker charts"""
+        return pd.DataFrame({
+            "date": [date.fromordinal(day).strftime("%Y-%m-%d") for day in self.days],
+            "score": self.scores.tolist()
+        })
+
+
+class Session:
+    __slots__ = ("history", "score", "last_access")
+
+    def __init__(self, max_entries: int):
+        self.history = ScoreHistory(max_entries)
+        self.score = 0
+        self.last_access = time.monotonic()
+
+    @property
+    def nbytes(self) -> int:
+        return SESSION_OVERHEAD + self.history.nbytes
+
+
+# --- Session Store ---
+class SessionStore:
+    """Process-wide per-session state with memory budgets.
+
+    Sessions are kept in LRU order. When the global budget is exceeded, or a
+    session has been idle for `idle_timeout` seconds, it is spilled to a small
+    binary file and loaded back on its next access. Spilled sessions idle for
+    longer than `expire_after` are deleted.
+    """
+
+    def __init__(self, directory=SESSIONS_DIR, max_entries: int = 365,
+                 global_budget: int = 64 * 1024 * 1024, idle_timeout: float = 15 * 60,
+                 expire_after: float = 30 * 24 * 3600, sweep_interval: float = 60.0):
+        self.directory = directory
+        self.max_entries = max_entries
+        self.global_budget = global_budget
+        self.idle_timeout = idle_timeout
+        self.expire_after = expire_after
+        self.sweep_interval = sweep_interval
+        self.sessions = OrderedDict()
+        self.total_bytes = 0
+        self.spills = 0
+        self.loads = 0
+        self._last_sweep = time.monotonic()
+        self._lock = threading.Lock()
+        self.directory.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, session_id: str):
+        return self.directory / f"{session_id}.bin"
+
+    def _touch(self, session_id: str) -> Session:
+        """Return a live session, loading or creating it (lock held)"""
+        session = self.sessions.get(session_id)
+        if session is None:
+            session = self._load(session_id) or Session(self.max_entries)
+            self.sessions[session_id] = session
+            self.total_bytes += session.nbytes
+        self.sessions.move_to_end(session_id)
+        session.last_access = time.monotonic()
+        return session
+
+    def _load(self, session_id: str):
+        path = self._path(session_id)
+        try:
+            data = path.read_bytes()
+        except FileNotFoundError:
+            return None
+        session = Session(self.max_entries)
+        session.score, count = SPILL_HEADER.unpack_from(data)
+        offset = SPILL_HEADER.size
+        session.history.days.frombytes(data[offset:offset + 4 * count])
+        session.history.scores.frombytes(data[offset + 4 * count:offset + 6 * count])
+        path.unlink()
+        self.loads += 1
+        return session
+
+    def _spill(self, session_id: str):
+        session = self.sessions.pop(session_id)
+        self.total_bytes -= session.nbytes
+        history = session.history
+        tmp_path = self._path(session_id).with_suffix(".tmp")
+        tmp_path.write_bytes(
+            SPILL_HEADER.pack(session.score, len(history)) + history.days.tobytes() + history.scores.tobytes()
+        )
+        os.replace(tmp_path, self._path(session_id))
+        self.spills += 1
+
+    def _enforce(self):
+        """Spill cold sessions until within budget (lock held)"""
+        now = time.monotonic()
+        # Oldest first; the most recently used session always stays live
+        while len(self.sessions) > 1:
+            session_id, session = next(iter(self.sessions.items()))
+            if self.total_bytes <= self.global_budget and now - session.last_access < self.idle_timeout:
+                break
+            self._spill(session_id)
+
+        if now - self._last_sweep >= self.sweep_interval:
+            self._last_sweep = now
+            cutoff = time.time() - self.expire_after
+            for path in self.directory.glob("*.bin"):
+                if path.stat().st_mtime < cutoff:
+                    path.unlink(missing_ok=True)
+
+    def get(self, session_id: str) -> Session:
+        """Session state for reading (it stays owned by the store)"""
+        with self._lock:
+            session = self._touch(session_id)
+            self._enforce()
+            return session
+
+    def append_history(self, session_id: str, day: date, score: int):
+        with self._lock:
+            session = self._touch(session_id)
+            before = session.nbytes
+            session.history.append(day, score)
+            self.total_bytes += session.nbytes - before
+            self._enforce()
+
+    def add_score(self, session_id: str, points: int) -> int:
+        with self._lock:
+            session = self._touch(session_id)
+            session.score += points
+            return session.score
+
+    def set_score(self, session_id: str, score: int):
+        with self._lock:
+            self._touch(session_id).score = score
+
+    def metrics(self) -> dict:
+        """Live/spilled session counts and memory use"""
+        with self._lock:
+            live = len(self.sessions)
+            return {
+                "live_sessions": live,
+                "spilled_sessions": sum(1 for _ in self.directory.glob("*.bin")),
+                "total_bytes": self.total_bytes,
+                "bytes_per_session": self.total_bytes / live if live else 0,
+                "spills": self.spills,
+                "loads": self.loads
+            }
@@ -0,0 +1,118 @@
+import base64
+import os
+import runpy
+from datetime import date
+from pathlib import Path
+
+import streamlit as st
+from huggingface_hub import hf_hub_download
+
+from cohort_stats import CohortStats
+from eco_planner import ImprovementPlanner
+from event_log import EventLog
+from gen_cache import CachedGenerator, GenerationCache
+from leaderboard import Leaderboard
+from session_store import SessionStore
+
+ROOT = Path(__file__).parent
+HF_REPO = "senkamalam/reward"
+
+# Scripts served as pages by app.py and the model each one generates with
+VARIANTS = {
+    "green_ai.py": "gpt2",
+    "greenscore_ai.py": "distilgpt2",
+    "g1.py": "distilgpt2",
+    "g2.py": "distilgpt2",
+    "green1.py": "distilgpt2",
+    "eco_game.py": "gpt2"
+}
+
+
+class StubGenerator:
+    """Instant stand-in for a text-generation pipeline (GREENEARTH_STUB_MODEL=1)"""
+
+    def __init__(self, model: str):
+        self.model = model
+
+    def __call__(self, prompt: str, **kwargs):
+        tips = " 1. Walk or bike short trips. 2. Try a meat-free day. 3. Switch to a green energy plan."
+        return [{"generated_text": prompt + tips}]
+
+
+# --- Process-Level Caches ---
+# Loaded once per server process and shared by every page and session.
+@st.cache_resource
+def load_generator(model: str):
+    """Text-generation pipeline for a model, kept in its stored dtype.
+
+    Calls go through the shared generation cache, except for the stub.
+    """
+    if os.environ.get("GREENEARTH_STUB_MODEL") == "1":
+        return StubGenerator(model)
+    lm = None
+    if os.environ.get("GREENEARTH_MMAP_WEIGHTS") == "1":
+        # Weights shared read-only with every other app process via the page cache
+        from model_loader import load_mapped_model
+
+        lm = load_mapped_model(model)
+    if os.environ.get("GREENEARTH_COMPILED_DECODE") == "1":
+        # Static-shape KV cache and a traced/compiled decode step (gpt2/distilgpt2)
+        from compiled_decode import BACKENDS, load_compiled_generator
+
+        backends = os.environ.get("GREENEARTH_DECODE_BACKEND", ",".join(BACKENDS)).split(",")
+        generator = load_compiled_generator(model, lm=lm, backends=backends)
+    else:
+        from transformers import pipeline
+
+        generator = pipeline("text-generation", model=lm or model, tokenizer=model, framework="pt", device=-1)
+    return CachedGenerator(generator, model, load_generation_cache())
+
+@st.cache_resource
+def load_generation_cache():
+    """Generation outputs cache; GREENEARTH_DETERMINISTIC=0 turns off seeded sampling"""
+    return GenerationCache(deterministic=os.environ.get("GREENEARTH_DETERMINISTIC", "1") == "1")
+
+@st.cache_resource
+def load_session_store():
+    return SessionStore()
+
+@st.cache_resource
+def load_cohort_stats():
+    return CohortStats()
+
+def record_cohort(category: str, value: float):
+    """Record this session's value for today, replacing its earlier one"""
+    today = date.today().isoformat()
+    recorded = st.session_state.setdefault("cohort_recorded", {})
+    day, previous = recorded.get(category, (None, None))
+    load_cohort_stats().record(category, value, day=today, replace=previous if day == today else None)
+    recorded[category] = (today, value)
+
+@st.cache_resource
+def load_event_log():
+    return EventLog()
+
+@st.cache_resource
+def load_leaderboard():
+    return Leaderboard()
+
+@st.cache_resource
+def load_planner():
+    return ImprovementPlanner()
+
+@st.cache_resource
+def load_sound(sound_type: str) -> str:
+    """Base64 mp3 for a feedback sound, downloaded once"""
+    audio_file = hf_hub_download(
+        repo_id=HF_REPO,
+        filename=f"{sound_type}.mp3",
+        repo_type="space"
+    )
+    with open(audio_file, "rb") as f:
+        return base64.b64encode(f.read()).decode()
+
+
+# --- Pages ---
+def run_variant(script: str):
+    """Run one of the standalone scripts as a page of the multi-page app"""
+    runpy.run_path(str(ROOT / script), run_name="__main__")